@@ -0,0 +1,109 @@
+import logging
+import random
+from pathlib import Path
+from typing import List
+
+from PIL import Image, ImageDraw, ImageFilter
+
+logger = logging.getLogger(__name__)
+
+# A4 page size in inches
+PAGE_SIZE_INCHES = (8.27, 11.69)
+
+WORDS = [
+    "anno", "domini", "inventarium", "folio", "register", "brief", "archiv",
+    "catalogue", "photographie", "museum", "liste", "seite", "datum", "nummer"
+]
+
+def render_page(dpi: int, text_density: float, rng: random.Random, scanned: bool = False) -> Image.Image:
+    """
+    Render a synthetic document page.
+    
+    Args:
+        dpi: Resolution of the page
+        text_density: Fraction of text lines that are filled (0.0 to 1.0)
+        rng: Random number generator used for the page content
+        scanned: Simulate a scan with a darker scanner bed, skew and noise
+        
+    Returns:
+        Rendered page image
+    """
+    width = int(PAGE_SIZE_INCHES[0] * dpi)
+    height = int(PAGE_SIZE_INCHES[1] * dpi)
+    page = Image.new("L", (width, height), 245)
+    draw = ImageDraw.Draw(page)
+    
+    margin = int(0.8 * dpi)
+    line_height = max(4, int(0.22 * dpi))
+    glyph_width = max(2, int(0.09 * dpi))
+    
+    y = margin
+    while y + line_height < height - margin:
+        if rng.random() < text_density:
+            x = margin
+            while x < width - margin:
+                word = rng.choice(WORDS)
+                word_width = len(word) * glyph_width
+                if x + word_width > width - margin:
+                    break
+                # Draw each word as a dark block of glyph-sized strokes
+                for i in range(len(word)):
+                    gx = x + i * glyph_width
+                    stroke = rng.randint(line_height // 3, line_height - 2)
+                    draw.rectangle([gx, y + line_height - stroke, gx + glyph_width - 2, y + line_height - 2], fill=rng.randint(20, 70))
+                x += word_width + glyph_width
+        y += int(line_height * 1.5)
+    
+    if scanned:
+        bed = Image.new("L", (int(width * 1.1), int(height * 1.06)), 60)
+        page = page.rotate(rng.uniform(-2.0, 2.0), resample=Image.BICUBIC, expand=True, fillcolor=245)
+        bed.paste(page, ((bed.width - page.width) // 2, (bed.height - page.height) // 2))
+        page = bed.filter(ImageFilter.GaussianBlur(0.6))
+    
+    return page.convert("RGB")
+
+def generate_corpus(
+    output_dir: Path,
+    documents: int = 2,
+    pages: int = 10,
+    dpi: int = 150,
+    text_density: float = 0.7,
+    kind: str = "pdf",
+    seed: int = 0
+) -> List[Path]:
+    """
+    Generate a reproducible corpus of synthetic documents.
+    
+    Args:
+        output_dir: Directory to write the documents to
+        documents: Number of documents
+        pages: Number of pages per document
+        dpi: Page resolution
+        text_density: Fraction of text lines that are filled
+        kind: "pdf" for multi-page PDFs, "scan" for one JPEG scan per page
+        seed: Random seed
+        
+    Returns:
+        List of generated file paths
+    """
+    if kind not in ("pdf", "scan"):
+        raise ValueError(f"Unknown corpus kind: {kind}")
+    
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    
+    paths = []
+    for doc in range(documents):
+        if kind == "pdf":
+            images = [render_page(dpi, text_density, rng) for _ in range(pages)]
+            path = output_dir / f"document_{doc + 1:03d}.pdf"
+            images[0].save(path, "PDF", resolution=dpi, save_all=True, append_images=images[1:])
+            paths.append(path)
+        else:
+            for page in range(pages):
+                path = output_dir / f"document_{doc + 1:03d}_page_{page + 1:04d}.jpg"
+                render_page(dpi, text_density, rng, scanned=True).save(path, "JPEG", quality=90)
+                paths.append(path)
+    
+    logger.info(f"Generated {len(paths)} {kind} files in {output_dir}")
+    return paths
@@ -0,0 +1,141 @@
+import gzip
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Analysis returned for structured (JSON) requests
+MOCK_ANALYSIS = {
+    "language": "German",
+    "time_period": "Early 20th century",
+    "material_type": "Inventories or lists",
+    "script_type": "printed",
+    "format_layout": "Single column with numbered entries",
+    "sequencing": "Page numbers in the top margin",
+    "dependencies": "Entries continue across pages",
+    "transcription_challenges": ["Faded print", "Abbreviations"]
+}
+
+class MockLLMServer:
+    """Local HTTP server imitating a chat completions endpoint with configurable latency."""
+    
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        """
+        Initialize the mock server.
+        
+        Args:
+            latency: Seconds to wait before answering each request
+            host: Host to bind to
+            port: Port to bind to, 0 picks a free port
+        """
+        self.latency = latency
+        self.requests = 0
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def url(self) -> str:
+        """URL of the chat completions endpoint."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+    
+    def start(self) -> "MockLLMServer":
+        """Start serving in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Mock LLM server listening on {self.url}")
+        return self
+    
+    def stop(self) -> None:
+        """Stop the server."""
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+    
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+    
+    def _record(self, size: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += size
+    
+    def _make_handler(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self._read_body()
+                server._record(len(body))
+                
+                try:
+                    if self.headers.get("Content-Encoding", "").lower() == "gzip":
+                        body = gzip.decompress(body)
+                    payload = json.loads(body)
+                except (OSError, ValueError):
+                    payload = {}
+                
+                if server.latency:
+                    time.sleep(server.latency)
+                
+                response = json.dumps(build_response(payload)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+            
+            def _read_body(self) -> bytes:
+                if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                    chunks = []
+                    while True:
+                        size = int(self.rfile.readline().strip(), 16)
+                        if size == 0:
+                            self.rfile.readline()
+                            break
+                        chunks.append(self.rfile.read(size))
+                        self.rfile.readline()
+                    return b"".join(chunks)
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+        
+        return Handler
+
+def build_response(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a chat completion response for a request payload.
+    
+    Args:
+        payload: Decoded request payload
+        
+    Returns:
+        Chat completion response
+    """
+    prompt = "".join(
+        part.get("text", "") for message in payload.get("messages", [])
+        for part in message.get("content", []) if isinstance(part, dict)
+    )
+    # Structured requests either set response_format or ask for JSON in the prompt
+    if "response_format" in payload or "JSON object" in prompt:
+        content = json.dumps(MOCK_ANALYSIS)
+    else:
+        content = "\n".join(f"{key}: {value}" for key, value in MOCK_ANALYSIS.items())
+    
+    return {
+        "id": "mock",
+        "object": "chat.completion",
+        "model": payload.get("model", "mock"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    }
@@ -0,0 +1,247 @@
+"""
+Benchmark harness for the transcription pipeline.
+
+Generates a synthetic corpus, runs each pipeline stage in a worker process
+against a local mock LLM server and writes the results to a JSON file.
+
+Usage:
+    python -m benchmarks.run --pages 20 --dpi 200 --latency 0.5
+    python -m benchmarks.run --compare bench_results/<baseline>.json
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STAGES = ["pdf", "image", "llm", "end_to_end"]
+RESULTS_DIR = Path("bench_results")
+
+def _run_stage(stage: str, corpus_dir: str, work_dir: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one benchmark stage in a worker process, measuring its own peak RSS.
+    
+    The worker inherits the peak RSS of the benchmark process, so the peak is
+    reset when the stage starts; where that is not supported, the reported
+    peak may include the memory used by the benchmark process.
+    
+    Args:
+        stage: Stage name
+        corpus_dir: Directory with the synthetic corpus
+        work_dir: Scratch directory for stage output
+        options: Benchmark options
+        
+    Returns:
+        Stage measurements
+    """
+    from src import profiling
+    from src.image_analyzer import ImageAnalyzer
+    from src.llm_interface import LLMInterface
+    from benchmarks.mock_llm_server import MockLLMServer
+    
+    corpus = Path(corpus_dir)
+    work = Path(work_dir)
+    pdfs = sorted((corpus / "pdf").glob("*.pdf"))
+    scans = sorted((corpus / "scan").glob("*.jpg"))
+    if not profiling.reset_peak_rss():
+        logger.warning("Cannot reset the peak RSS, it may include the memory of the benchmark process")
+    profiler = profiling.enable()
+    
+    with MockLLMServer(latency=options["latency"]) as server:
+        llm = LLMInterface(api_key="benchmark", api_url=server.url, model="mock", gzip=options.get("gzip", False))
+        start = time.perf_counter()
+        
+        if stage == "pdf":
+            from src.pdf_processor import PDFProcessor
+            processor = PDFProcessor(work / "pages")
+            pages = sum(len(processor.convert_pdf_to_images(pdf)) for pdf in pdfs)
+        elif stage == "image":
+            pages = len(ImageAnalyzer().prepare_images_for_llm(scans))
+        elif stage == "llm":
+            image_data = ImageAnalyzer(raw=True).prepare_images_for_llm(scans[:options["sample_size"]])
+            elapsed_prepare = time.perf_counter() - start
+            for _ in range(options["requests"]):
+                llm.analyze_images(image_data, ["Inventories or lists"])
+            start += elapsed_prepare
+            pages = len(image_data) * options["requests"]
+        elif stage == "end_to_end":
+            from src.agent import TranscriptionAgent
+            from src.pdf_processor import PDFProcessor
+            agent = TranscriptionAgent(
+                llm_interface=llm,
+                pdf_processor=PDFProcessor(work / "pages"),
+                image_analyzer=ImageAnalyzer(sample_size=options["sample_size"], raw=True),
+                material_types=["Inventories or lists"],
+                sample_size=options["sample_size"]
+            )
+            pages = agent.process_input(str(corpus / "scan"))["total_images"]
+        else:
+            raise ValueError(f"Unknown stage: {stage}")
+        
+        seconds = time.perf_counter() - start
+    
+    report = profiler.report()
+    profiling.disable()
+    
+    return {
+        "pages": pages,
+        "seconds": seconds,
+        "pages_per_sec": pages / seconds if seconds else None,
+        "peak_rss_bytes": report["peak_rss_bytes"],
+        "bytes_uploaded": server.bytes_received,
+        "requests": server.requests,
+        "stages": {name: {k: v for k, v in stats.items() if k != "buckets"} for name, stats in report["stages"].items()}
+    }
+
+def run_benchmarks(options: Dict[str, Any], stages: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Generate the corpus and run the selected stages.
+    
+    Args:
+        options: Benchmark options
+        stages: Stages to run, defaults to all
+        
+    Returns:
+        Benchmark results including environment metadata
+    """
+    from benchmarks.corpus import generate_corpus
+    
+    stages = stages or STAGES
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": options,
+        "stages": {}
+    }
+    
+    with tempfile.TemporaryDirectory(prefix="transkriptor-bench-") as tmp:
+        corpus = Path(tmp) / "corpus"
+        corpus_options = dict(
+            documents=options["documents"], pages=options["pages"], dpi=options["dpi"],
+            text_density=options["text_density"], seed=options["seed"]
+        )
+        generate_corpus(corpus / "pdf", kind="pdf", **corpus_options)
+        generate_corpus(corpus / "scan", kind="scan", **corpus_options)
+        
+        context = multiprocessing.get_context("spawn")
+        for stage in stages:
+            runs = []
+            for repeat in range(options["repeat"]):
+                work_dir = Path(tmp) / f"{stage}_{repeat}"
+                work_dir.mkdir()
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    try:
+                        runs.append(executor.submit(_run_stage, stage, str(corpus), str(work_dir), options).result())
+                    except Exception as e:
+                        logger.warning(f"Benchmark stage {stage} failed: {e}")
+                        results["stages"][stage] = {"skipped": str(e)}
+                        break
+            
+            if runs:
+                # Report the median run by wall time
+                runs.sort(key=lambda run: run["seconds"])
+                results["stages"][stage] = dict(runs[len(runs) // 2], repeats=[run["seconds"] for run in runs])
+                logger.info(f"{stage}: {results['stages'][stage]['pages_per_sec']:.2f} pages/sec")
+    
+    return results
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.10) -> List[str]:
+    """
+    Compare two benchmark results.
+    
+    Args:
+        baseline: Baseline results
+        current: Current results
+        threshold: Relative throughput drop reported as a regression
+        
+    Returns:
+        List of regression descriptions
+    """
+    regressions = []
+    for stage, stats in current["stages"].items():
+        base = baseline["stages"].get(stage, {})
+        if not base.get("pages_per_sec") or not stats.get("pages_per_sec"):
+            continue
+        change = stats["pages_per_sec"] / base["pages_per_sec"] - 1
+        line = (
+            f"{stage}: {base['pages_per_sec']:.2f} -> {stats['pages_per_sec']:.2f} pages/sec ({change:+.1%}), "
+            f"peak RSS {base['peak_rss_bytes']} -> {stats['peak_rss_bytes']}, "
+            f"uploaded {base['bytes_uploaded']} -> {stats['bytes_uploaded']} bytes"
+        )
+        print(line)
+        if change < -threshold:
+            regressions.append(line)
+    return regressions
+
+def _git_commit() -> Optional[str]:
+    """Return the current git commit, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the benchmark argument parser."""
+    parser = argparse.ArgumentParser(description="Benchmark the transcription pipeline on a synthetic corpus.")
+    parser.add_argument("--documents", type=int, default=2, help="Number of synthetic documents")
+    parser.add_argument("--pages", type=int, default=10, help="Pages per document")
+    parser.add_argument("--dpi", type=int, default=150, help="Page resolution")
+    parser.add_argument("--text-density", type=float, default=0.7, help="Fraction of filled text lines")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mock LLM latency in seconds")
+    parser.add_argument("--sample-size", type=int, default=5, help="Images per LLM request")
+    parser.add_argument("--requests", type=int, default=5, help="LLM requests in the llm stage")
+    parser.add_argument("--gzip", action="store_true", help="Gzip-compress the LLM request bodies")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage, the median is reported")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus random seed")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, help="Stages to run")
+    parser.add_argument("--output", type=Path, help="Results file (default: bench_results/<timestamp>_<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="Baseline results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Throughput drop reported as a regression")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmarks from the command line."""
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    
+    options = {
+        "documents": args.documents, "pages": args.pages, "dpi": args.dpi,
+        "text_density": args.text_density, "latency": args.latency, "sample_size": args.sample_size,
+        "requests": args.requests, "repeat": args.repeat, "seed": args.seed, "gzip": args.gzip
+    }
+    results = run_benchmarks(options, args.stages)
+    
+    output = args.output
+    if output is None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        output = RESULTS_DIR / f"{stamp}_{results['commit'] or 'unknown'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Benchmark results saved to: {output}")
+    
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare_results(json.load(f), results, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} stage(s) regressed by more than {args.threshold:.0%}")
+            return 1
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,10 +11,6 @@ BASE_DIR = Path(__file__).resolve().parent
 INPUT_DIR = BASE_DIR / "data"
 OUTPUT_DIR = BASE_DIR / "output"
 
-# Create directories if they don't exist
-INPUT_DIR.mkdir(exist_ok=True)
-OUTPUT_DIR.mkdir(exist_ok=True)
-
 # LLM Configuration
 # LLM_API_KEY = os.getenv("LLM_API_KEY")
 # LLM_API_URL = os.getenv("LLM_API_URL", "https://api.openai.com/v1/chat/completions")
@@ -25,15 +21,21 @@ LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 LOG_FORMAT = os.getenv("LOG_FORMAT", "%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 LOG_FILE = BASE_DIR / "transcription_agent.log"
 
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
-    format=LOG_FORMAT,
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+def configure_logging():
+    """Configure logging to the console and the log file."""
+    logging.basicConfig(
+        level=getattr(logging, LOG_LEVEL),
+        format=LOG_FORMAT,
+        handlers=[
+            logging.FileHandler(LOG_FILE),
+            logging.StreamHandler()
+        ]
+    )
+
+def ensure_directories():
+    """Create the default input and output directories if they don't exist."""
+    INPUT_DIR.mkdir(exist_ok=True)
+    OUTPUT_DIR.mkdir(exist_ok=True)
 
 # Sample size for image analysis
 SAMPLE_SIZE = int(os.getenv("SAMPLE_SIZE", "5"))
@@ -51,11 +53,36 @@ MATERIAL_TYPES = [
 
 # OpenAI Configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY environment variable is not set")
+OPENAI_API_URL = os.getenv("OPENAI_API_URL", "https://api.openai.com/v1/chat/completions")
+
+def require_api_key():
+    """
+    Return the OpenAI API key, validated only by commands that call the API.
+    
+    Returns:
+        The API key
+    """
+    if not OPENAI_API_KEY:
+        raise ValueError("OPENAI_API_KEY environment variable is not set")
+    return OPENAI_API_KEY
 
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4-vision-preview")
 MAX_TOKENS = int(os.getenv("MAX_TOKENS", "1000"))
 
+# Request a structured JSON analysis instead of free text
+STRUCTURED_ANALYSIS = os.getenv("STRUCTURED_ANALYSIS", "false").lower() in ("1", "true", "yes")
+
+# The model accepts response_format json_schema (e.g. gpt-4o); otherwise the JSON is only requested in the prompt
+STRUCTURED_OUTPUTS = os.getenv("STRUCTURED_OUTPUTS", "false").lower() in ("1", "true", "yes")
+
+# Store rasterized PDF pages in one packed page store per document
+PACKED_PAGES = os.getenv("PACKED_PAGES", "false").lower() in ("1", "true", "yes")
+
+# Image preprocessing steps before upload (comma-separated: crop,deskew,binarize)
+PREPROCESS = os.getenv("PREPROCESS", "")
+
+# Gzip-compress request bodies; only for endpoints that accept Content-Encoding: gzip
+GZIP_REQUESTS = os.getenv("GZIP_REQUESTS", "false").lower() in ("1", "true", "yes")
+
 # Supported Image Formats
 SUPPORTED_IMAGE_FORMATS = os.getenv("SUPPORTED_IMAGE_FORMATS", ".jpg,.jpeg,.png").split(",") 
\ No newline at end of file
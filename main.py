@@ -5,93 +5,469 @@ from pathlib import Path
 import os
 import sys
 
-from config import (
-    INPUT_DIR, OUTPUT_DIR, OPENAI_API_KEY, 
-    OPENAI_MODEL, MAX_TOKENS, SAMPLE_SIZE, MATERIAL_TYPES
-)
-from src.agent import TranscriptionAgent
-from src.pdf_processor import PDFProcessor
-from src.image_analyzer import ImageAnalyzer
-from src.llm_interface import LLMInterface
-
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
+# Heavy modules (pdf2image, PIL, requests) are imported inside the commands
+# that need them so that --help, scan and sample start quickly.
+import config
+
 logger = logging.getLogger(__name__)
 
-def main():
-    """Main entry point for the transcription agent."""
-    
-    print("=== DEBUG: Script started ===")
-    
+COMMANDS = ("scan", "sample", "analyze", "transcribe", "worker", "search", "ground-truth", "evaluate", "bench")
+
+def positive_int(value):
+    """Parse a command line integer that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+def build_parser():
+    """Build the command line parser."""
+    parser = argparse.ArgumentParser(description="AI-supported transcription of historical documents.")
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--input", type=Path, default=Path(os.getenv("TRANSCRIPTOR_INPUT", "./data")),
+                        help="Folder with the input PDFs and images (default: ./data)")
+    common.add_argument("--output", type=Path, default=Path(os.getenv("TRANSCRIPTOR_OUTPUT", "./output")),
+                        help="Folder for extracted pages and results (default: ./output)")
+    common.add_argument("--results", type=Path,
+                        help="SQLite results store (default: <output>/results.db)")
+
+    run_options = argparse.ArgumentParser(add_help=False, parents=[common])
+    run_options.add_argument("--packed", action=argparse.BooleanOptionalAction, default=config.PACKED_PAGES,
+                             help="Store rasterized PDF pages in one packed file per document "
+                                  "(default: $PACKED_PAGES, otherwise off)")
+    run_options.add_argument("--preprocess", default=config.PREPROCESS,
+                             help="Comma-separated preprocessing steps before upload: crop,deskew,binarize")
+    run_options.add_argument("--gzip", action=argparse.BooleanOptionalAction, default=config.GZIP_REQUESTS,
+                             help="Gzip-compress request bodies, the API endpoint must accept it "
+                                  "(default: $GZIP_REQUESTS, otherwise off)")
+    run_options.add_argument("--profile", action="store_true",
+                             help="Run under cProfile and write the stats to the output directory")
+    run_options.add_argument("--metrics-json", type=Path,
+                             help="Write per-stage timings, byte counts and peak RSS to this JSON file")
+    run_options.add_argument("--metrics-prometheus", type=Path,
+                             help="Write per-stage metrics to this file in Prometheus text format")
+
+    scan = subparsers.add_parser("scan", parents=[common], help="List the input files")
+    scan.set_defaults(handler=cmd_scan)
+
+    sample = subparsers.add_parser("sample", parents=[common], help="Show the images that would be sampled")
+    sample.add_argument("--sample-size", type=positive_int, default=config.SAMPLE_SIZE)
+    sample.add_argument("--seed", type=int, help="Random seed for reproducible samples")
+    sample.set_defaults(handler=cmd_sample)
+
+    analyze = subparsers.add_parser("analyze", parents=[run_options], help="Describe the material (default)")
+    analyze.add_argument("--sample-size", type=positive_int, default=config.SAMPLE_SIZE)
+    analyze.add_argument("--structured", action=argparse.BooleanOptionalAction, default=config.STRUCTURED_ANALYSIS,
+                         help="Request a structured JSON analysis (default: $STRUCTURED_ANALYSIS, otherwise off)")
+    analyze.add_argument("--adaptive", action="store_true",
+                         help="Analyze pages in small parallel rounds until the description is stable")
+    analyze.add_argument("--min-samples", type=int, default=2, help="Minimum pages in adaptive mode")
+    analyze.add_argument("--max-samples", type=int, default=10, help="Maximum pages in adaptive mode")
+    analyze.add_argument("--round-size", type=int, default=2, help="Pages analyzed in parallel per adaptive round")
+    analyze.add_argument("--latency-budget", type=float,
+                         help="Seconds after which adaptive mode starts no new round")
+    analyze.set_defaults(handler=cmd_analyze)
+
+    prompt_options = argparse.ArgumentParser(add_help=False)
+    prompt_options.add_argument("--analysis", type=Path,
+                                help="Analysis result used to adapt the prompt (default: <output>/analysis_result.json)")
+    prompt_options.add_argument("--prompt", type=Path,
+                                help="File with transcription instructions replacing the default ones")
+
+    queue_options = argparse.ArgumentParser(add_help=False)
+    queue_options.add_argument("--queue", type=Path,
+                               help="Shared SQLite work queue file for distributed transcription")
+    queue_options.add_argument("--visibility-timeout", type=float, default=300.0,
+                               help="Seconds before a page leased by a stalled worker is handed out again")
+
+    transcribe = subparsers.add_parser("transcribe", parents=[run_options, prompt_options, queue_options],
+                                       help="Transcribe every page")
+    transcribe.add_argument("--workers", type=int, default=4,
+                            help="Local worker processes when using --queue; 0 waits for remote workers")
+    transcribe.set_defaults(handler=cmd_transcribe)
+
+    worker = subparsers.add_parser("worker", parents=[run_options, prompt_options, queue_options],
+                                   help="Transcribe pages from a shared work queue")
+    worker.add_argument("--batch-size", type=int, default=1, help="Pages leased at once")
+    worker.set_defaults(handler=cmd_worker)
+
+    search = subparsers.add_parser("search", parents=[common], help="Search the stored transcriptions")
+    search.add_argument("query", nargs="?", help="Full-text query, e.g. 'anno AND domini' or 'inventar*'")
+    search.add_argument("--language", help="Only pages with this language")
+    search.add_argument("--material-type", help="Only pages with this material type")
+    search.add_argument("--document", help="Only pages of this document")
+    search.add_argument("--stage", default="transcription", help="Pipeline stage (default: transcription)")
+    search.add_argument("--limit", type=int, default=20)
+    search.add_argument("--compact", action="store_true", help="Compact the store before searching")
+    search.set_defaults(handler=cmd_search)
+
+    ground_truth = subparsers.add_parser("ground-truth", parents=[common],
+                                         help="Export transcribed pages for correction")
+    ground_truth.add_argument("--ground-truth", type=Path,
+                              help="Folder with the corrected pages (default: <output>/ground_truth)")
+    ground_truth.add_argument("--document", help="Only pages of this document")
+    ground_truth.add_argument("--limit", type=int, default=20, help="Number of pages to export")
+    ground_truth.add_argument("--force", action="store_true", help="Overwrite pages that were already exported")
+    ground_truth.set_defaults(handler=cmd_ground_truth)
+
+    evaluate = subparsers.add_parser("evaluate", parents=[run_options, prompt_options],
+                                     help="Score transcription prompts against the corrected pages")
+    evaluate.add_argument("--variant", type=Path, action="append", default=[],
+                          help="File with alternative transcription instructions; can be repeated")
+    evaluate.add_argument("--ground-truth", type=Path,
+                          help="Folder with the corrected pages (default: <output>/ground_truth)")
+    evaluate.add_argument("--workers", type=int, default=8, help="Concurrent requests")
+    evaluate.add_argument("--all-pages", action="store_true", help="Include exported pages that were not corrected")
+    evaluate.add_argument("--no-cache", action="store_true", help="Send every request even if a response is cached")
+    evaluate.set_defaults(handler=cmd_evaluate)
+
+    # All options of bench, including --help, are passed on to benchmarks.run
+    bench = subparsers.add_parser("bench", add_help=False,
+                                  help="Run the benchmark suite (see python main.py bench --help)")
+    bench.set_defaults(handler=cmd_bench, bench_args=[])
+
+    return parser
+
+def cmd_scan(args):
+    """List the PDF and image files in the input folder."""
+    from src.utils import get_file_list
+
+    pdf_files = get_file_list(args.input, ["pdf"])
+    image_files = get_file_list(args.input, ["jpg", "jpeg", "png"])
+
+    for path in sorted(pdf_files + image_files):
+        print(path)
+    print(f"{len(pdf_files)} PDFs, {len(image_files)} images in {args.input}")
+    return 0
+
+def cmd_sample(args):
+    """Print the images that would be sampled for analysis."""
+    import random
+    from src.utils import get_file_list, sample_images
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    image_files = get_file_list(args.input, ["jpg", "jpeg", "png"])
+    for path in sample_images(image_files, args.sample_size):
+        print(path)
+    return 0
+
+def create_agent(args, sample_size=None, structured=False):
+    """Create a transcription agent from the command line arguments."""
+    from src.agent import TranscriptionAgent
+    from src.pdf_processor import PDFProcessor
+    from src.image_analyzer import ImageAnalyzer
+    from src.llm_interface import LLMInterface
+
+    api_key = config.require_api_key()
+    if sample_size is None:
+        sample_size = config.SAMPLE_SIZE
+    prompt_file = getattr(args, "prompt", None)
+    preprocess = None
+    if args.preprocess:
+        from src.preprocessing import PreprocessOptions
+        preprocess = PreprocessOptions.from_steps(args.preprocess)
+
+    args.output.mkdir(exist_ok=True)
+    return TranscriptionAgent(
+        llm_interface=LLMInterface(
+            api_key=api_key,
+            api_url=config.OPENAI_API_URL,
+            model=config.OPENAI_MODEL,
+            max_tokens=config.MAX_TOKENS,
+            gzip=args.gzip,
+            structured_outputs=config.STRUCTURED_OUTPUTS,
+            transcription_instructions=prompt_file.read_text(encoding="utf-8") if prompt_file else None
+        ),
+        pdf_processor=PDFProcessor(args.output, packed=args.packed),
+        image_analyzer=ImageAnalyzer(
+            sample_size=sample_size,
+            preprocess=preprocess,
+            cache_dir=args.output / ".preprocess_cache",
+            raw=True
+        ),
+        material_types=config.MATERIAL_TYPES,
+        sample_size=sample_size,
+        structured=structured
+    )
+
+def cmd_analyze(args):
+    """Analyze a sample of the input and describe the material."""
+    from src import profiling
+
+    agent = create_agent(args, args.sample_size, args.structured)
     try:
-        print("Starting transcription agent...")
-        
-        # Use environment variables or default paths
-        input_dir = os.getenv("TRANSCRIPTOR_INPUT", "./data")
-        output_dir = os.getenv("TRANSCRIPTOR_OUTPUT", "./output")
-        
-        print(f"DEBUG: Input directory: {input_dir}")
-        print(f"DEBUG: Output directory: {output_dir}")
-        
-        # Convert to Path objects
-        input_dir = Path(input_dir)
-        output_dir = Path(output_dir)
-        
-        # Create output directory
-        output_dir.mkdir(exist_ok=True)
-        
-        # Check for API key
-        print(f"DEBUG: Checking API key...")
-        if not OPENAI_API_KEY:
-            raise ValueError("API key not found. Please set the OPENAI_API_KEY environment variable.")
-        print(f"Using API key: {OPENAI_API_KEY[:10]}...")
-        
-        print("DEBUG: Initializing components...")
-        # Initialize components
-        pdf_processor = PDFProcessor(output_dir)
-        image_analyzer = ImageAnalyzer(sample_size=SAMPLE_SIZE)
-        llm_interface = LLMInterface(
-            api_key=OPENAI_API_KEY,
-            api_url="https://api.openai.com/v1/chat/completions",
-            model=OPENAI_MODEL
-        )
-        
-        print("DEBUG: Creating agent...")
-        # Initialize agent
-        agent = TranscriptionAgent(
-            llm_interface=llm_interface,
-            pdf_processor=pdf_processor,
-            image_analyzer=image_analyzer,
-            material_types=MATERIAL_TYPES,
-            sample_size=SAMPLE_SIZE
-        )
-        
-        print("DEBUG: Processing input...")
-        # Process input
-        result = agent.process_input(input_dir)
-        
-        # Save result to file
-        result_file = output_dir / "analysis_result.json"
+        if args.adaptive:
+            result = agent.process_input_adaptive(
+                str(args.input),
+                min_samples=args.min_samples,
+                max_samples=args.max_samples,
+                batch_size=args.round_size,
+                latency_budget=args.latency_budget
+            )
+        else:
+            result = agent.process_input(str(args.input))
+    finally:
+        agent.close()
+
+    # Save result to file, keeping only the token usage of the raw response
+    raw_response = result.pop("raw_response", None) or {}
+    usage = result.setdefault("usage", raw_response.get("usage", {}))
+    result_file = args.output / "analysis_result.json"
+    with profiling.stage("write_result"):
         with open(result_file, "w") as f:
             json.dump(result, f, indent=2)
-        
-        # Display analysis to user
-        print("\n" + "="*80)
-        print("DOCUMENT MATERIAL ANALYSIS")
-        print("="*80 + "\n")
-        print(result["analysis"])
-        print("\n" + "="*80)
-        print(f"Analysis saved to: {result_file}")
-        
+        with open_results(args) as store:
+            store.add(result["input_directory"], result["analysis"], stage="analysis",
+                      metadata=result.get("structured_analysis"), usage=usage)
+
+    # Display analysis to user
+    print("\n" + "="*80)
+    print("DOCUMENT MATERIAL ANALYSIS")
+    print("="*80 + "\n")
+    print(result["analysis"])
+    print("\n" + "="*80)
+    print(f"Analysis saved to: {result_file}")
+    return 0
+
+def open_results(args):
+    """Open the results store."""
+    from src.results_store import ResultsStore
+
+    args.output.mkdir(exist_ok=True)
+    return ResultsStore(args.results or args.output / "results.db")
+
+def load_analysis(args):
+    """Load the structured analysis used to adapt the transcription prompt, if any."""
+    analysis_file = args.analysis or args.output / "analysis_result.json"
+    if analysis_file.exists():
+        with open(analysis_file) as f:
+            return json.load(f).get("structured_analysis")
+    if args.analysis:
+        raise FileNotFoundError(f"Analysis file {analysis_file} does not exist")
+    return None
+
+def cmd_transcribe(args):
+    """Transcribe every page of the input."""
+    from src import profiling
+
+    analysis = load_analysis(args)
+    agent = create_agent(args)
+
+    if args.queue:
+        from functools import partial
+        from src.distributed import Coordinator, start_local_workers
+        from src.work_queue import WorkQueue
+
+        coordinator = Coordinator(WorkQueue(args.queue, visibility_timeout=args.visibility_timeout))
+        try:
+            _, _, pages = agent.collect_pages(str(args.input))
+        finally:
+            agent.close()
+        coordinator.submit(pages)
+
+        processes = start_local_workers(coordinator.queue, partial(create_agent, args), args.workers, analysis)
+        coordinator.wait(processes=processes)
+        for process in processes:
+            process.join()
+
+        results = coordinator.results()
+        failures = coordinator.queue.failures()
+    else:
+        try:
+            results = agent.transcribe(str(args.input), analysis)
+        finally:
+            agent.close()
+        failures = {result["page"]: result["error"] for result in results if "error" in result}
+        results = [result for result in results if "error" not in result]
+
+    for page, error in failures.items():
+        print(f"Failed: {page}: {error}")
+
+    metadata = {"prompt": "analysis" if analysis else "default"}
+    if analysis:
+        metadata.update(language=analysis.get("language"), material_type=analysis.get("material_type"))
+
+    with profiling.stage("write_result"):
+        with open_results(args) as store:
+            for result in results:
+                store.add(result["page"], result["text"], metadata=metadata, usage=result.get("usage"))
+
+    print(f"Transcribed {len(results)} pages, saved to: {store.path}")
+    return 0
+
+def cmd_worker(args):
+    """Transcribe pages from a shared work queue until it is finished."""
+    from src.distributed import Worker
+    from src.work_queue import WorkQueue
+
+    if not args.queue:
+        raise ValueError("The worker command requires --queue")
+
+    queue = WorkQueue(args.queue, visibility_timeout=args.visibility_timeout)
+    agent = create_agent(args)
+    try:
+        completed = Worker(queue, agent, load_analysis(args), batch_size=args.batch_size).run()
+    finally:
+        agent.close()
+
+    print(f"Transcribed {completed} pages from {args.queue}")
+    return 0
+
+def cmd_search(args):
+    """Search the stored transcriptions."""
+    filters = dict(language=args.language, material_type=args.material_type,
+                   document=args.document, stage=args.stage)
+
+    with open_results(args) as store:
+        if args.compact:
+            store.compact()
+        if args.query:
+            records = store.search(args.query, limit=args.limit, **filters)
+            for record in records:
+                print(f"{record['page_id']}: {record['snippet']}")
+            print(f"{len(records)} results in {store.path}")
+        else:
+            for record in store.query(limit=args.limit, **filters):
+                print(f"{record['page_id']} ({record['language'] or 'unknown language'})")
+            print(f"{store.count(**filters)} matching pages in {store.path}")
+    return 0
+
+def cmd_ground_truth(args):
+    """Export transcribed pages as text files for correction."""
+    from src.evaluation import GroundTruthStore
+    from src.utils import sampling_order
+
+    store = GroundTruthStore(args.ground_truth or args.output / "ground_truth")
+    with open_results(args) as results:
+        records = {r["page_id"]: r for r in results.query(include_text=True, stage="transcription",
+                                                          document=args.document)}
+    if not records:
+        raise ValueError("No transcriptions in the results store, run the transcribe command first")
+
+    exported = 0
+    for page_id in sampling_order(list(records))[:args.limit]:
+        if store.add(page_id, records[page_id]["text"] or "", overwrite=args.force):
+            exported += 1
+
+    print(f"Exported {exported} pages to {store.directory} ({len(store)} in total)")
+    print("Correct the text files, then score prompt variants with: python main.py evaluate --variant <file>")
+    return 0
+
+def cmd_evaluate(args):
+    """Score the current and alternative transcription prompts against the corrected pages."""
+    from src.evaluation import GroundTruthStore, PromptEvaluator, ResponseCache
+
+    # Variants are named by file name; "current" is the configured prompt
+    names = ["current"]
+    for variant in args.variant:
+        if variant.stem in names:
+            raise ValueError(f"Duplicate prompt name '{variant.stem}' for {variant}, rename the variant file")
+        names.append(variant.stem)
+
+    store = GroundTruthStore(args.ground_truth or args.output / "ground_truth")
+    ground_truth = store.items(corrected_only=not args.all_pages)
+    if not ground_truth:
+        raise ValueError(f"No corrected pages in {store.directory}, "
+                         "export pages with the ground-truth command and correct them")
+
+    analysis = load_analysis(args)
+    agent = create_agent(args)
+    llm = agent.llm_interface
+    prompts = {"current": llm.create_transcription_prompt(analysis)}
+    for variant in args.variant:
+        prompts[variant.stem] = llm.create_transcription_prompt(analysis, variant.read_text(encoding="utf-8"))
+
+    cache = None if args.no_cache else ResponseCache(args.output / ".response_cache")
+    evaluator = PromptEvaluator(llm, agent.image_analyzer, cache=cache, workers=args.workers)
+    try:
+        scores = evaluator.evaluate(prompts, ground_truth)
+    finally:
+        agent.close()
+
+    result_file = args.output / "evaluation_result.json"
+    with open(result_file, "w") as f:
+        json.dump(scores, f, indent=2)
+
+    print(f"{'prompt':<24} {'CER':>8} {'WER':>8}  pages")
+    for score in scores:
+        cer = f"{score['cer']:.2%}" if score["cer"] is not None else "n/a"
+        wer = f"{score['wer']:.2%}" if score["wer"] is not None else "n/a"
+        print(f"{score['name']:<24} {cer:>8} {wer:>8}  {len(score['pages'])} "
+              f"({score['cached']} cached, {score['errors']} errors)")
+    print(f"Evaluation saved to: {result_file}")
+    return 0
+
+def cmd_bench(args):
+    """Run the benchmark suite."""
+    from benchmarks.run import main as bench_main
+
+    return bench_main(args.bench_args)
+
+def run_profiled(args):
+    """Run a command, optionally under cProfile and with stage metrics."""
+    if not hasattr(args, "profile"):
+        return args.handler(args)
+
+    from src import profiling
+
+    profiler = None
+    if args.metrics_json or args.metrics_prometheus:
+        profiler = profiling.enable()
+
+    try:
+        if args.profile:
+            import cProfile
+            import pstats
+
+            args.output.mkdir(exist_ok=True)
+            stats_file = args.output / "profile.pstats"
+
+            cprofiler = cProfile.Profile()
+            status = cprofiler.runcall(args.handler, args)
+            cprofiler.dump_stats(stats_file)
+            pstats.Stats(cprofiler).sort_stats("cumulative").print_stats(25)
+            print(f"Profile saved to: {stats_file}")
+        else:
+            status = args.handler(args)
+    finally:
+        if profiler is not None:
+            if args.metrics_json:
+                profiler.write_json(args.metrics_json)
+            if args.metrics_prometheus:
+                profiler.write_prometheus(args.metrics_prometheus)
+            profiling.disable()
+
+    return status
+
+def main(argv=None):
+    """Main entry point for the transcription agent."""
+    argv = sys.argv[1:] if argv is None else list(argv)
+
+    # Without a command, run the material analysis as before
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help")):
+        argv = ["analyze"] + argv
+
+    parser = build_parser()
+    args, unknown = parser.parse_known_args(argv)
+    if args.command == "bench":
+        args.bench_args = unknown[1:] if unknown[:1] == ["--"] else unknown
+    elif unknown:
+        parser.error(f"unrecognized arguments: {' '.join(unknown)}")
+    config.configure_logging()
+
+    try:
+        return run_profiled(args)
     except Exception as e:
         print(f"=== ERROR: {str(e)} ===")
         logger.error(f"Error in transcription agent: {e}", exc_info=True)
-        import traceback
-        traceback.print_exc()
         return 1
-    
-    return 0
 
 if __name__ == "__main__":
-    exit(main()) 
\ No newline at end of file
+    exit(main())
@@ -4,4 +4,7 @@ setup(
     name="transcriptor",
     version="0.1",
     packages=find_packages(),
+    extras_require={
+        "preprocess": ["numpy"],
+    },
 ) 
\ No newline at end of file
@@ -1,11 +1,16 @@
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Union, Tuple
 
 from .pdf_processor import PDFProcessor
 from .image_analyzer import ImageAnalyzer
 from .llm_interface import LLMInterface
-from .utils import validate_input_path, get_file_list
+from .material_analysis import MaterialAnalysis, consensus, is_settled, merge_analyses
+from .page_store import PageSource, page_id
+from .utils import validate_input_path, get_file_list, sampling_order
+from . import profiling
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +25,8 @@ class TranscriptionAgent:
         pdf_processor: PDFProcessor,
         image_analyzer: ImageAnalyzer,
         material_types: List[str],
-        sample_size: int = 5
+        sample_size: int = 5,
+        structured: bool = False
     ):
         """
         Initialize the transcription agent.
@@ -31,31 +37,36 @@ class TranscriptionAgent:
             image_analyzer: Analyzer for images
             material_types: List of potential material types
             sample_size: Number of images to sample for analysis
+            structured: Request a structured JSON analysis instead of free text
         """
         self.llm_interface = llm_interface
         self.pdf_processor = pdf_processor
         self.image_analyzer = image_analyzer
         self.material_types = material_types
         self.sample_size = sample_size
+        self.structured = structured
         
-    def process_input(self, input_path: Optional[str] = None) -> Dict[str, Any]:
+    def close(self) -> None:
+        """Release the resources of the image analyzer."""
+        self.image_analyzer.close()
+    
+    def collect_pages(self, input_path: Optional[str] = None) -> Tuple[Path, List[Path], List[PageSource]]:
         """
-        Process input files and generate material description.
+        Find the input files and convert PDFs into page images.
         
         Args:
             input_path: Optional path to input directory
             
         Returns:
-            Dictionary with processing results
+            Tuple of the input directory, the PDF files and all page images
         """
-        logger.info("Starting input processing")
-        
         # Validate input path
         input_dir = validate_input_path(input_path)
         
         # Get PDF and image files
-        pdf_files = get_file_list(input_dir, ["pdf"])
-        image_files = get_file_list(input_dir, ["jpg", "jpeg", "png"])
+        with profiling.stage("scan"):
+            pdf_files = get_file_list(input_dir, ["pdf"])
+            image_files = get_file_list(input_dir, ["jpg", "jpeg", "png"])
         
         if not pdf_files and not image_files:
             logger.error(f"No PDF or image files found in {input_dir}")
@@ -72,17 +83,37 @@ class TranscriptionAgent:
         # Add direct image files
         all_images.extend(image_files)
         
+        return input_dir, pdf_files, all_images
+    
+    def process_input(self, input_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Process input files and generate material description.
+        
+        Args:
+            input_path: Optional path to input directory
+            
+        Returns:
+            Dictionary with processing results
+        """
+        logger.info("Starting input processing")
+        
+        input_dir, pdf_files, all_images = self.collect_pages(input_path)
+        
         # Sample images for analysis
         sampled_images = self.image_analyzer.sample_images(all_images)
         
         # Prepare images for LLM
         image_data = self.image_analyzer.prepare_images_for_llm(sampled_images)
         
-        # Send to LLM for analysis
-        llm_response = self.llm_interface.analyze_images(image_data, self.material_types)
-        
-        # Extract analysis text
-        analysis_text = self.llm_interface.extract_analysis_text(llm_response)
+        # Send to LLM for analysis and extract the analysis
+        structured_analysis = None
+        if self.structured:
+            llm_response = self.llm_interface.analyze_images_structured(image_data, self.material_types)
+            structured_analysis = self.llm_interface.extract_structured_analysis(llm_response)
+            analysis_text = structured_analysis.to_text()
+        else:
+            llm_response = self.llm_interface.analyze_images(image_data, self.material_types)
+            analysis_text = self.llm_interface.extract_analysis_text(llm_response)
         
         # Prepare result
         result = {
@@ -93,6 +124,188 @@ class TranscriptionAgent:
             "analysis": analysis_text,
             "raw_response": llm_response
         }
+        if structured_analysis is not None:
+            result["structured_analysis"] = structured_analysis.to_dict()
         
         logger.info("Input processing completed successfully")
-        return result 
\ No newline at end of file
+        return result
+    
+    def process_input_adaptive(
+        self,
+        input_path: Optional[str] = None,
+        min_samples: int = 2,
+        max_samples: int = 10,
+        batch_size: int = 2,
+        latency_budget: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze sampled pages in small parallel batches until the description converges.
+        
+        Each page is analyzed on its own with a structured analysis. After every
+        batch the language, material type and script type of all analyzed pages
+        are checked for a clear majority (see is_settled); sampling stops once
+        they are settled and at least min_samples pages were analyzed, once
+        max_samples pages were analyzed, or once the latency budget is used up.
+        
+        Args:
+            input_path: Optional path to input directory
+            min_samples: Minimum number of pages to analyze
+            max_samples: Maximum number of pages to analyze
+            batch_size: Number of pages analyzed in parallel per round
+            latency_budget: Optional time limit in seconds; no new round is started after it
+            
+        Returns:
+            Dictionary with processing results
+        """
+        logger.info("Starting adaptive input processing")
+        start = time.monotonic()
+        
+        input_dir, pdf_files, all_images = self.collect_pages(input_path)
+        candidates = sampling_order(all_images)[:max_samples]
+        
+        analyzed: List[Tuple[PageSource, MaterialAnalysis]] = []
+        usage: Dict[str, int] = {}
+        converged = False
+        rounds = 0
+        
+        with ThreadPoolExecutor(max_workers=batch_size) as executor:
+            while candidates:
+                batch, candidates = candidates[:batch_size], candidates[batch_size:]
+                rounds += 1
+                
+                for page, result in zip(batch, executor.map(self._analyze_page, batch)):
+                    if result is None:
+                        continue
+                    analyzed.append((page, result[0]))
+                    for key, value in result[1].items():
+                        if isinstance(value, int):
+                            usage[key] = usage.get(key, 0) + value
+                
+                if not analyzed:
+                    continue
+                analyses = [analysis for _, analysis in analyzed]
+                logger.info(f"Round {rounds}: {len(analyzed)} pages analyzed, consensus {consensus(analyses)}")
+                
+                if len(analyzed) >= min_samples and is_settled(analyses):
+                    converged = True
+                    break
+                
+                if latency_budget is not None and time.monotonic() - start >= latency_budget:
+                    logger.info(f"Latency budget of {latency_budget}s used up after {rounds} rounds")
+                    break
+        
+        if not analyzed:
+            raise ValueError("None of the sampled pages could be analyzed")
+        
+        structured_analysis = merge_analyses([analysis for _, analysis in analyzed])
+        
+        result = {
+            "input_directory": str(input_dir),
+            "total_pdfs": len(pdf_files),
+            "total_images": len(all_images),
+            "sampled_images": [str(page) for page, _ in analyzed],
+            "analysis": structured_analysis.to_text(),
+            "structured_analysis": structured_analysis.to_dict(),
+            "page_analyses": [analysis.to_dict() for _, analysis in analyzed],
+            "rounds": rounds,
+            "converged": converged,
+            "usage": usage
+        }
+        
+        logger.info(f"Adaptive processing completed after {len(analyzed)} pages (converged: {converged})")
+        return result
+    
+    def _analyze_page(self, page: PageSource) -> Optional[Tuple[MaterialAnalysis, Dict[str, Any]]]:
+        """
+        Analyze a single page with a structured analysis.
+        
+        Args:
+            page: Path to the page image or reference to a packed page
+            
+        Returns:
+            Tuple of the analysis and the token usage, or None if the page failed
+        """
+        try:
+            image_data = self.image_analyzer.prepare_images_for_llm([page])
+            if not image_data:
+                return None
+            llm_response = self.llm_interface.analyze_images_structured(image_data, self.material_types)
+            analysis = self.llm_interface.extract_structured_analysis(llm_response)
+            return analysis, llm_response.get("usage", {})
+        except Exception as e:
+            logger.error(f"Error analyzing page {page}: {e}")
+            return None
+    
+    def transcribe_page(
+        self,
+        page: PageSource,
+        analysis: Optional[Dict[str, Any]] = None,
+        image: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Transcribe a single page.
+        
+        Args:
+            page: Path to the page image or reference to a packed page
+            analysis: Optional structured material analysis used to adapt the prompt
+            image: Optional image data of the page that was already prepared
+            
+        Returns:
+            Dictionary with the canonical page identifier, its transcription and the token usage
+        """
+        prompt = self.llm_interface.create_transcription_prompt(analysis)
+        if image is None:
+            image_data = self.image_analyzer.prepare_images_for_llm([page])
+            if not image_data:
+                raise ValueError(f"Could not prepare page {page} for transcription")
+            image = image_data[0]
+        
+        llm_response = self.llm_interface.transcribe_image(image, prompt)
+        
+        return {
+            "page": page_id(page),
+            "text": self.llm_interface.extract_analysis_text(llm_response),
+            "usage": llm_response.get("usage", {})
+        }
+    
+    def transcribe(
+        self,
+        input_path: Optional[str] = None,
+        analysis: Optional[Dict[str, Any]] = None,
+        batch_size: int = 8
+    ) -> List[Dict[str, Any]]:
+        """
+        Transcribe every page of the input collection.
+        
+        Pages are prepared in batches, so preprocessing runs in parallel
+        before the requests of a batch are sent. A page that fails is logged
+        and reported with its error, the remaining pages are still transcribed.
+        
+        Args:
+            input_path: Optional path to input directory
+            analysis: Optional structured material analysis used to adapt the prompt
+            batch_size: Number of pages prepared at once
+            
+        Returns:
+            List of page transcriptions; failed pages have an "error" instead of a "text"
+        """
+        logger.info("Starting transcription")
+        
+        _, _, all_images = self.collect_pages(input_path)
+        
+        results = []
+        failed = 0
+        for start in range(0, len(all_images), batch_size):
+            batch = all_images[start:start + batch_size]
+            prepared = {image["path"]: image for image in self.image_analyzer.prepare_images_for_llm(batch)}
+            for page in batch:
+                # Pages that could not be prepared are retried alone and report their error
+                try:
+                    results.append(self.transcribe_page(page, analysis, prepared.get(str(page))))
+                except Exception as e:
+                    logger.error(f"Error transcribing {page}: {e}")
+                    results.append({"page": page_id(page), "error": str(e)})
+                    failed += 1
+        
+        logger.info(f"Transcribed {len(results) - failed} pages, {failed} failed")
+        return results
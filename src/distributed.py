@@ -0,0 +1,244 @@
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .page_store import PageRef, PageSource, page_id
+from .work_queue import WorkQueue, Task
+
+logger = logging.getLogger(__name__)
+
+def encode_page(page: PageSource) -> Dict[str, Any]:
+    """
+    Encode a page as a JSON-serializable task payload.
+
+    Paths are made absolute, so workers started in another directory or on
+    another machine with the same shared filesystem can open the page.
+
+    Args:
+        page: Path to the page image or reference to a packed page
+
+    Returns:
+        Task payload
+    """
+    if isinstance(page, PageRef):
+        return {"store": str(Path(page.store_path).resolve()), "index": page.index}
+    return {"path": str(Path(page).resolve())}
+
+def decode_page(payload: Dict[str, Any]) -> PageSource:
+    """
+    Decode a task payload created by encode_page.
+
+    Args:
+        payload: Task payload
+
+    Returns:
+        Path to the page image or reference to a packed page
+    """
+    if "store" in payload:
+        return PageRef(Path(payload["store"]), payload["index"])
+    return Path(payload["path"])
+
+class Coordinator:
+    """Enqueues the pages of a collection and collects the transcriptions."""
+
+    def __init__(self, queue: WorkQueue):
+        """
+        Initialize the coordinator.
+
+        Args:
+            queue: Shared work queue
+        """
+        self.queue = queue
+
+    def submit(self, pages: List[PageSource]) -> int:
+        """
+        Enqueue pages for transcription; pages that are already queued are skipped.
+
+        Tasks are keyed by the canonical page identifier, so the same page
+        submitted from another working directory is not queued again.
+
+        Args:
+            pages: Pages to transcribe
+
+        Returns:
+            Number of newly queued pages
+        """
+        return self.queue.enqueue([(page_id(page), encode_page(page)) for page in pages])
+
+    def wait(self, poll_interval: float = 5.0, processes: Optional[List[multiprocessing.Process]] = None) -> Dict[str, int]:
+        """
+        Wait until all pages are done or failed.
+
+        Args:
+            poll_interval: Seconds between progress checks
+            processes: Local worker processes; waiting stops early if all of them exit
+
+        Returns:
+            Final task counts by status
+        """
+        while True:
+            stats = self.queue.stats()
+            if stats["pending"] == 0 and stats["leased"] == 0:
+                break
+            if processes and not any(process.is_alive() for process in processes):
+                logger.warning("All local workers exited before the queue was finished")
+                break
+            logger.info(f"Queue progress: {stats}")
+            time.sleep(poll_interval)
+
+        logger.info(f"Queue finished: {stats}")
+        return stats
+
+    def results(self) -> List[Dict[str, Any]]:
+        """
+        Return one transcription per completed page, in page order.
+
+        Returns:
+            List of page transcriptions
+        """
+        return self.queue.results()
+
+class Worker:
+    """Leases pages from a shared queue and transcribes them with an agent."""
+
+    def __init__(
+        self,
+        queue: WorkQueue,
+        agent,
+        analysis: Optional[Dict[str, Any]] = None,
+        worker_id: Optional[str] = None,
+        batch_size: int = 1,
+        poll_interval: float = 1.0
+    ):
+        """
+        Initialize the worker.
+
+        Args:
+            queue: Shared work queue
+            agent: TranscriptionAgent used to transcribe pages
+            analysis: Optional structured material analysis used to adapt the prompt
+            worker_id: Unique worker ID, generated from host and process if omitted
+            batch_size: Number of pages leased at once
+            poll_interval: Seconds to wait while other workers hold the remaining leases
+        """
+        self.queue = queue
+        self.agent = agent
+        self.analysis = analysis
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._held: List[str] = []
+        self._held_lock = threading.Lock()
+
+    def run(self, stop_when_empty: bool = True) -> int:
+        """
+        Process tasks until the queue is finished.
+
+        Args:
+            stop_when_empty: Return once no task is pending or leased, instead of polling forever
+
+        Returns:
+            Number of pages completed by this worker
+        """
+        logger.info(f"Worker {self.worker_id} started on {self.queue.path}")
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(stop,), daemon=True)
+        heartbeat.start()
+
+        completed = 0
+        try:
+            while True:
+                tasks = self.queue.lease(self.worker_id, self.batch_size)
+                if not tasks:
+                    if stop_when_empty and self.queue.is_finished():
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+
+                with self._held_lock:
+                    self._held = [task.task_id for task in tasks]
+                for task in tasks:
+                    completed += self._process(task)
+                    with self._held_lock:
+                        self._held.remove(task.task_id)
+        finally:
+            stop.set()
+            heartbeat.join()
+
+        logger.info(f"Worker {self.worker_id} finished after completing {completed} pages")
+        return completed
+
+    def _process(self, task: Task) -> int:
+        """Transcribe one page and report the result; returns 1 if the result was stored."""
+        try:
+            result = self.agent.transcribe_page(decode_page(task.payload), self.analysis)
+            result["page"] = task.task_id
+        except Exception as e:
+            logger.error(f"Worker {self.worker_id} failed on {task.task_id} (attempt {task.attempts}): {e}")
+            self.queue.fail(task.task_id, self.worker_id, str(e))
+            return 0
+        return int(self.queue.complete(task.task_id, self.worker_id, result))
+
+    def _heartbeat(self, stop: threading.Event) -> None:
+        """Renew the held leases until stopped."""
+        interval = self.queue.visibility_timeout / 3
+        while not stop.wait(interval):
+            with self._held_lock:
+                held = list(self._held)
+            try:
+                self.queue.heartbeat(self.worker_id, held)
+            except Exception as e:
+                logger.warning(f"Worker {self.worker_id} heartbeat failed: {e}")
+
+def _worker_main(
+    queue_path: str,
+    visibility_timeout: float,
+    agent_factory: Callable[[], Any],
+    analysis: Optional[Dict[str, Any]],
+    batch_size: int
+) -> None:
+    """Entry point of a local worker process."""
+    queue = WorkQueue(Path(queue_path), visibility_timeout=visibility_timeout)
+    agent = agent_factory()
+    try:
+        Worker(queue, agent, analysis, batch_size=batch_size).run()
+    finally:
+        agent.close()
+
+def start_local_workers(
+    queue: WorkQueue,
+    agent_factory: Callable[[], Any],
+    num_workers: int,
+    analysis: Optional[Dict[str, Any]] = None,
+    batch_size: int = 1
+) -> List[multiprocessing.Process]:
+    """
+    Start worker processes on this machine.
+
+    Args:
+        queue: Shared work queue
+        agent_factory: Picklable callable creating a TranscriptionAgent in each process
+        num_workers: Number of worker processes
+        analysis: Optional structured material analysis used to adapt the prompt
+        batch_size: Number of pages each worker leases at once
+
+    Returns:
+        List of started processes
+    """
+    processes = []
+    for _ in range(num_workers):
+        process = multiprocessing.Process(
+            target=_worker_main,
+            args=(str(queue.path), queue.visibility_timeout, agent_factory, analysis, batch_size)
+        )
+        process.start()
+        processes.append(process)
+
+    logger.info(f"Started {num_workers} local workers on {queue.path}")
+    return processes
@@ -0,0 +1,378 @@
+import base64
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .page_store import PageSource, parse_page
+from .results_store import page_location
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "ground_truth.json"
+
+def edit_distance(a: Sequence, b: Sequence) -> int:
+    """
+    Compute the Levenshtein distance between two strings or token lists.
+
+    Uses the bit-parallel algorithm of Myers and Hyyrö, with one bit per
+    element of the shorter sequence in a Python integer, so a page is
+    compared in a few milliseconds instead of the seconds a dynamic
+    programming table would take.
+
+    Args:
+        a: First sequence
+        b: Second sequence
+
+    Returns:
+        Minimum number of insertions, deletions and substitutions turning a into b
+    """
+    # Common prefixes and suffixes never need edits
+    start = 0
+    limit = min(len(a), len(b))
+    while start < limit and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < limit - start and a[len(a) - 1 - end] == b[len(b) - 1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+
+    # Bit masks of the positions of each symbol in the shorter sequence
+    peq: Dict[Any, int] = {}
+    for i, symbol in enumerate(b):
+        peq[symbol] = peq.get(symbol, 0) | (1 << i)
+
+    full = (1 << len(b)) - 1
+    last = 1 << (len(b) - 1)
+    positive, negative = full, 0
+    distance = len(b)
+    for symbol in a:
+        eq = peq.get(symbol, 0)
+        xv = eq | negative
+        xh = (((eq & positive) + positive) ^ positive) | eq
+        horizontal_positive = negative | (~(xh | positive) & full)
+        horizontal_negative = positive & xh
+        if horizontal_positive & last:
+            distance += 1
+        elif horizontal_negative & last:
+            distance -= 1
+        horizontal_positive = ((horizontal_positive << 1) | 1) & full
+        horizontal_negative = (horizontal_negative << 1) & full
+        positive = horizontal_negative | (~(xv | horizontal_positive) & full)
+        negative = horizontal_positive & xv
+    return distance
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace, so line breaks and spacing do not count as errors."""
+    return " ".join(text.split())
+
+def cer(reference: str, hypothesis: str) -> float:
+    """
+    Compute the character error rate.
+
+    Args:
+        reference: Corrected text
+        hypothesis: Transcription
+
+    Returns:
+        Character edits per reference character
+    """
+    reference, hypothesis = normalize_text(reference), normalize_text(hypothesis)
+    return edit_distance(reference, hypothesis) / max(len(reference), 1)
+
+def wer(reference: str, hypothesis: str) -> float:
+    """
+    Compute the word error rate.
+
+    Args:
+        reference: Corrected text
+        hypothesis: Transcription
+
+    Returns:
+        Word edits per reference word
+    """
+    reference_words, hypothesis_words = reference.split(), hypothesis.split()
+    return edit_distance(reference_words, hypothesis_words) / max(len(reference_words), 1)
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class GroundTruthStore:
+    """
+    Corrected page transcriptions, one editable text file per page.
+
+    A manifest maps each file to its page and remembers a hash of the
+    exported draft, so pages that were corrected can be told apart from
+    drafts nobody has reviewed yet.
+    """
+
+    def __init__(self, directory: Path):
+        """
+        Open or create a ground truth directory.
+
+        Args:
+            directory: Directory with the text files and the manifest
+        """
+        self.directory = Path(directory)
+        manifest = self.directory / MANIFEST
+        self._entries: Dict[str, Dict[str, str]] = {}
+        if manifest.exists():
+            with open(manifest) as f:
+                self._entries = json.load(f)
+        self._files = {entry["page"]: name for name, entry in self._entries.items()}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, page_id: str, text: str, overwrite: bool = False) -> bool:
+        """
+        Add a draft transcription for correction.
+
+        Args:
+            page_id: Page identifier
+            text: Draft transcription
+            overwrite: Replace the file of a page that is already present
+
+        Returns:
+            True if the file was written
+        """
+        name = self._files.get(page_id)
+        if name is not None and not overwrite:
+            return False
+        if name is None:
+            name = self._file_name(page_id)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / name).write_text(text, encoding="utf-8")
+        self._entries[name] = {"page": page_id, "draft": _sha256(text)}
+        self._files[page_id] = name
+        self._save()
+        return True
+
+    def get(self, page_id: str) -> Optional[str]:
+        """
+        Return the current text of a page.
+
+        Args:
+            page_id: Page identifier
+
+        Returns:
+            Page text, or None if the page has no ground truth
+        """
+        name = self._files.get(page_id)
+        if name is None:
+            return None
+        return (self.directory / name).read_text(encoding="utf-8")
+
+    def is_corrected(self, page_id: str) -> bool:
+        """Return True if the text of a page was edited since it was exported."""
+        text = self.get(page_id)
+        return text is not None and _sha256(text) != self._entries[self._files[page_id]]["draft"]
+
+    def items(self, corrected_only: bool = True) -> List[Tuple[str, str]]:
+        """
+        Return the ground truth pages.
+
+        Args:
+            corrected_only: Skip drafts that were not edited
+
+        Returns:
+            List of (page identifier, text) pairs in page order
+        """
+        pages = []
+        for name, entry in sorted(self._entries.items()):
+            if not (self.directory / name).exists():
+                logger.warning(f"Ground truth file {name} is missing")
+                continue
+            if corrected_only and not self.is_corrected(entry["page"]):
+                continue
+            pages.append((entry["page"], self.get(entry["page"])))
+        return pages
+
+    def _file_name(self, page_id: str) -> str:
+        document, page = page_location(page_id)
+        stem = f"{document}_page_{page:04d}" if page is not None else document
+        name, counter = f"{stem}.txt", 1
+        while name in self._entries:
+            counter += 1
+            name = f"{stem}_{counter}.txt"
+        return name
+
+    def _save(self) -> None:
+        manifest = self.directory / MANIFEST
+        tmp_file = manifest.with_name(f"{MANIFEST}.{os.getpid()}.tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(self._entries, f, indent=2)
+        os.replace(tmp_file, manifest)
+
+class ResponseCache:
+    """On-disk cache of transcriptions keyed by model, prompt and image."""
+
+    def __init__(self, directory: Path):
+        """
+        Open or create a response cache.
+
+        Args:
+            directory: Directory for the cached responses
+        """
+        self.directory = Path(directory)
+
+    @staticmethod
+    def key(model: str, prompt: str, image: Dict[str, Any], max_tokens: int) -> str:
+        """
+        Compute the cache key of a request.
+
+        Args:
+            model: Model name
+            prompt: Transcription prompt
+            image: Image data dictionary with raw "data" or "base64"
+            max_tokens: Maximum number of tokens in the response
+
+        Returns:
+            Hex digest identifying the request
+        """
+        digest = hashlib.sha256(repr((model, max_tokens, prompt)).encode("utf-8"))
+        digest.update(image["data"] if "data" in image else base64.b64decode(image["base64"]))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached response, or None."""
+        cache_file = self.directory / f"{key}.json"
+        if not cache_file.exists():
+            return None
+        with open(cache_file) as f:
+            return json.load(f)
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        """Store a response."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        cache_file = self.directory / f"{key}.json"
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(response, f)
+        os.replace(tmp_file, cache_file)
+
+class PromptEvaluator:
+    """Scores transcription prompt variants against corrected pages."""
+
+    def __init__(self, llm_interface, image_analyzer, cache: Optional[ResponseCache] = None, workers: int = 8):
+        """
+        Initialize the evaluator.
+
+        Args:
+            llm_interface: Interface to the LLM
+            image_analyzer: Image analyzer preparing the pages
+            cache: Optional response cache; unchanged prompts are not sent again
+            workers: Number of concurrent requests
+        """
+        self.llm_interface = llm_interface
+        self.image_analyzer = image_analyzer
+        self.cache = cache
+        self.workers = workers
+
+    def transcribe(self, image: Dict[str, Any], prompt: str) -> Tuple[Dict[str, Any], bool]:
+        """
+        Transcribe a prepared page, using the cache if possible.
+
+        Args:
+            image: Image data dictionary
+            prompt: Transcription prompt
+
+        Returns:
+            Tuple of the result with text and usage, and whether it came from the cache
+        """
+        key = None
+        if self.cache is not None:
+            key = ResponseCache.key(self.llm_interface.model, prompt, image, self.llm_interface.max_tokens)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached, True
+
+        response = self.llm_interface.transcribe_image(image, prompt)
+        result = {
+            "text": self.llm_interface.extract_analysis_text(response),
+            "usage": response.get("usage", {})
+        }
+        if key is not None:
+            self.cache.put(key, result)
+        return result, False
+
+    def evaluate(self, prompts: Dict[str, str], ground_truth: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Transcribe the ground truth pages with every prompt and score the results.
+
+        Each page is prepared once; the requests of all prompts run concurrently.
+
+        Args:
+            prompts: Mapping of variant name to transcription prompt
+            ground_truth: List of (page identifier, corrected text) pairs
+
+        Returns:
+            One score per prompt, lowest character error rate first
+        """
+        pages: List[PageSource] = [parse_page(page_id) for page_id, _ in ground_truth]
+        images = {image["path"]: image for image in self.image_analyzer.prepare_images_for_llm(pages)}
+
+        tasks = []
+        for name in prompts:
+            for page, (page_id, reference) in zip(pages, ground_truth):
+                image = images.get(str(page))
+                if image is None:
+                    logger.error(f"Skipping {page_id}, the page could not be prepared")
+                    continue
+                tasks.append((name, page_id, reference, image))
+
+        def run(task):
+            name, page_id, reference, image = task
+            try:
+                result, cached = self.transcribe(image, prompts[name])
+            except Exception as e:
+                logger.error(f"Error transcribing {page_id} with prompt {name}: {e}")
+                return task, None, False
+            return task, result, cached
+
+        logger.info(f"Evaluating {len(prompts)} prompts on {len(ground_truth)} pages")
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            outcomes = list(executor.map(run, tasks))
+
+        scores = {
+            name: {
+                "name": name, "prompt": prompt, "pages": [], "errors": 0, "cached": 0,
+                "char_edits": 0, "chars": 0, "word_edits": 0, "words": 0, "total_tokens": 0
+            }
+            for name, prompt in prompts.items()
+        }
+        for (name, page_id, reference, _), result, cached in outcomes:
+            score = scores[name]
+            if result is None:
+                score["errors"] += 1
+                continue
+            reference_text, text = normalize_text(reference), normalize_text(result["text"])
+            char_edits = edit_distance(reference_text, text)
+            word_edits = edit_distance(reference_text.split(), text.split())
+            score["char_edits"] += char_edits
+            score["chars"] += len(reference_text)
+            score["word_edits"] += word_edits
+            score["words"] += len(reference_text.split())
+            score["cached"] += cached
+            score["total_tokens"] += result.get("usage", {}).get("total_tokens", 0) or 0
+            score["pages"].append({
+                "page": page_id,
+                "cer": char_edits / max(len(reference_text), 1),
+                "wer": word_edits / max(len(reference_text.split()), 1),
+                "text": result["text"]
+            })
+
+        for score in scores.values():
+            score["cer"] = score["char_edits"] / score["chars"] if score["chars"] else None
+            score["wer"] = score["word_edits"] / score["words"] if score["words"] else None
+
+        return sorted(scores.values(), key=lambda s: (s["cer"] is None, s["cer"] or 0.0))
@@ -1,24 +1,69 @@
 import logging
+import threading
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Union
+from concurrent.futures import ProcessPoolExecutor
 import base64
 from PIL import Image
 import io
 
+from . import profiling
+from .page_store import BufferReader, PageRef, PageSource
+
+if TYPE_CHECKING:
+    # Imported on first use only, so commands without preprocessing do not load numpy
+    from .preprocessing import PreprocessOptions
+
 logger = logging.getLogger(__name__)
 
+# Maximum width and height of images sent to the LLM
+MAX_IMAGE_SIZE = 1024
+
 class ImageAnalyzer:
     """Class for analyzing images and preparing them for LLM processing."""
     
-    def __init__(self, sample_size: int = 5):
+    def __init__(
+        self,
+        sample_size: int = 5,
+        preprocess: Optional["PreprocessOptions"] = None,
+        workers: Optional[int] = None,
+        cache_dir: Optional[Path] = None,
+        raw: bool = False
+    ):
         """
         Initialize the image analyzer.
         
         Args:
             sample_size: Number of images to sample for analysis
+            preprocess: Optional preprocessing (margin crop, deskew, binarization)
+                applied before encoding; requires numpy
+            workers: Number of processes used for preprocessing, defaults to the CPU count
+            cache_dir: Optional directory for caching preprocessed images
+            raw: Return the encoded JPEG bytes under "data" instead of a base64
+                string, for payloads that base64-encode while streaming
         """
         self.sample_size = sample_size
+        self.preprocess = preprocess
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.raw = raw
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
         
+    def close(self) -> None:
+        """Shut down the preprocessing process pool."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Return the preprocessing process pool, started on first use and shared by all calls."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+    
     def sample_images(self, image_paths: List[Path]) -> List[Path]:
         """
         Sample a subset of images for analysis.
@@ -34,52 +79,88 @@ class ImageAnalyzer:
         logger.info(f"Sampling {self.sample_size} images from {len(image_paths)} total images")
         return sample_files(image_paths, self.sample_size)
     
-    def encode_image_to_base64(self, image_path: Path) -> str:
+    def encode_image_to_base64(self, image_path: PageSource) -> str:
         """
         Encode an image to base64 for API transmission.
         
         Args:
-            image_path: Path to the image
+            image_path: Path to the image or reference to a packed page
             
         Returns:
             Base64 encoded image string
         """
+        data = self.encode_image(image_path)
+        with profiling.stage("image_base64"):
+            return base64.b64encode(data).decode('utf-8')
+    
+    def encode_image(self, image_path: PageSource) -> Union[bytes, memoryview]:
+        """
+        Encode an image as JPEG for API transmission.
+        
+        JPEG images that do not need resizing are sent as stored,
+        without decoding and re-encoding them.
+        
+        Args:
+            image_path: Path to the image or reference to a packed page
+            
+        Returns:
+            JPEG encoded image; a memoryview for packed pages
+        """
         try:
+            source = image_path.read() if isinstance(image_path, PageRef) else None
+            
             # Open and resize image if needed
-            with Image.open(image_path) as img:
+            # Packed pages are read in place, only the header is copied to check the format
+            with Image.open(BufferReader(source) if source is not None else image_path) as img:
+                max_size = MAX_IMAGE_SIZE
+                if img.format == "JPEG" and img.mode in ("RGB", "L") and max(img.size) <= max_size:
+                    if source is None:
+                        with open(image_path, "rb") as f:
+                            source = f.read()
+                    return source
+                
+                with profiling.stage("image_decode"):
+                    img.load()
+                
                 # Resize if the image is too large
-                max_size = 1024
                 if max(img.size) > max_size:
-                    ratio = max_size / max(img.size)
-                    new_size = (int(img.size[0] * ratio), int(img.size[1] * ratio))
-                    img = img.resize(new_size, Image.LANCZOS)
+                    with profiling.stage("image_resize"):
+                        ratio = max_size / max(img.size)
+                        new_size = (int(img.size[0] * ratio), int(img.size[1] * ratio))
+                        img = img.resize(new_size, Image.LANCZOS)
                 
                 # Convert to bytes
-                buffer = io.BytesIO()
-                img.save(buffer, format="JPEG")
+                with profiling.stage("image_encode"):
+                    buffer = io.BytesIO()
+                    img.save(buffer, format="JPEG")
                 
-            # Encode to base64
-            return base64.b64encode(buffer.getvalue()).decode('utf-8')
+            return buffer.getvalue()
             
         except Exception as e:
             logger.error(f"Error encoding image {image_path}: {e}")
             raise
     
-    def prepare_images_for_llm(self, image_paths: List[Path]) -> List[Dict[str, Any]]:
+    def prepare_images_for_llm(self, image_paths: List[PageSource]) -> List[Dict[str, Any]]:
         """
         Prepare images for LLM analysis.
         
         Args:
-            image_paths: List of paths to images
+            image_paths: List of paths to images or references to packed pages
             
         Returns:
             List of image data dictionaries ready for LLM API
         """
         logger.info(f"Preparing {len(image_paths)} images for LLM analysis")
         
+        if self.preprocess is not None:
+            return self._prepare_preprocessed_images(image_paths)
+        
         image_data = []
         for path in image_paths:
             try:
+                if self.raw:
+                    image_data.append({"path": str(path), "data": self.encode_image(path)})
+                    continue
                 base64_image = self.encode_image_to_base64(path)
                 image_data.append({
                     "path": str(path),
@@ -88,4 +169,55 @@ class ImageAnalyzer:
             except Exception as e:
                 logger.error(f"Error preparing image {path}: {e}")
                 
-        return image_data 
\ No newline at end of file
+        return image_data
+    
+    def _prepare_preprocessed_images(self, image_paths: List[PageSource]) -> List[Dict[str, Any]]:
+        """
+        Preprocess images in the process pool and prepare them for LLM analysis.
+        
+        Calls from several threads share the pool, so pages prepared one at a
+        time by concurrent callers are still preprocessed in parallel.
+        
+        Args:
+            image_paths: List of paths to images or references to packed pages
+            
+        Returns:
+            List of image data dictionaries ready for LLM API
+        """
+        from .preprocessing import preprocess_to_jpeg
+        
+        args = (self.preprocess, MAX_IMAGE_SIZE, self.cache_dir)
+        
+        with profiling.stage("image_preprocess"):
+            if self.workers != 1:
+                executor = self._get_executor()
+                futures = [executor.submit(preprocess_to_jpeg, path, *args) for path in image_paths]
+                results = []
+                for future in futures:
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        results.append(e)
+            else:
+                results = []
+                for path in image_paths:
+                    try:
+                        results.append(preprocess_to_jpeg(path, *args))
+                    except Exception as e:
+                        results.append(e)
+        
+        image_data = []
+        for path, result in zip(image_paths, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error preprocessing image {path}: {result}")
+                continue
+            if self.raw:
+                image_data.append({"path": str(path), "data": result})
+                continue
+            with profiling.stage("image_base64"):
+                image_data.append({
+                    "path": str(path),
+                    "base64": base64.b64encode(result).decode('utf-8')
+                })
+        
+        return image_data
@@ -4,12 +4,39 @@ import json
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 
+from . import profiling
+from .payload import ImageData, StreamingPayload
+from .material_analysis import MaterialAnalysis, AnalysisValidationError, build_analysis_schema
+
 logger = logging.getLogger(__name__)
 
+# Field description appended to structured analysis and repair prompts
+STRUCTURED_FIELDS = (
+    "the fields language, time_period, material_type, script_type "
+    "(handwritten, printed or both), format_layout, sequencing, dependencies "
+    "and transcription_challenges (a list of strings)."
+)
+
+# Default instructions at the start of every transcription prompt
+TRANSCRIPTION_INSTRUCTIONS = (
+    "Transcribe all text on this document page exactly as written. "
+    "Preserve the original spelling, line breaks, abbreviations and punctuation. "
+    "Mark illegible passages with [illegible] and do not add any commentary.\n"
+)
+
 class LLMInterface:
     """Interface for communicating with the LLM API."""
     
-    def __init__(self, api_key: str, api_url: str, model: str):
+    def __init__(
+        self,
+        api_key: str,
+        api_url: str,
+        model: str,
+        max_tokens: int = 1000,
+        gzip: bool = False,
+        transcription_instructions: Optional[str] = None,
+        structured_outputs: bool = False
+    ):
         """
         Initialize the LLM interface.
         
@@ -17,10 +44,18 @@ class LLMInterface:
             api_key: API key for the LLM service
             api_url: URL for the LLM API
             model: Model name to use
+            max_tokens: Maximum number of tokens in a response
+            gzip: Gzip-compress streamed request bodies; the endpoint must accept Content-Encoding: gzip
+            transcription_instructions: Optional instructions replacing TRANSCRIPTION_INSTRUCTIONS
+            structured_outputs: The model accepts response_format; otherwise JSON is only requested in the prompt
         """
         self.api_key = api_key
         self.api_url = api_url
         self.model = model
+        self.max_tokens = max_tokens
+        self.gzip = gzip
+        self.transcription_instructions = transcription_instructions or TRANSCRIPTION_INSTRUCTIONS
+        self.structured_outputs = structured_outputs
         
     def create_analysis_prompt(self, material_types: List[str]) -> str:
         """
@@ -55,6 +90,59 @@ class LLMInterface:
         
         return prompt
     
+    def create_transcription_prompt(
+        self,
+        analysis: Optional[Dict[str, Any]] = None,
+        instructions: Optional[str] = None
+    ) -> str:
+        """
+        Create a prompt for transcribing a single page.
+        
+        Args:
+            analysis: Optional structured material analysis used to adapt the prompt
+            instructions: Optional instructions replacing the configured ones
+            
+        Returns:
+            Formatted prompt string
+        """
+        prompt = instructions or self.transcription_instructions
+        if not prompt.endswith("\n"):
+            prompt += "\n"
+        
+        if analysis:
+            challenges = analysis.get("transcription_challenges") or []
+            if isinstance(challenges, str):
+                challenges = [challenges]
+            prompt += (
+                "\nThe collection has been described as follows:\n"
+                f"- Language: {analysis.get('language', 'unknown')}\n"
+                f"- Time period: {analysis.get('time_period', 'unknown')}\n"
+                f"- Material type: {analysis.get('material_type', 'unknown')}\n"
+                f"- Handwritten/printed: {analysis.get('script_type', 'unknown')}\n"
+                f"- Format and layout: {analysis.get('format_layout', 'unknown')}\n"
+            )
+            for challenge in challenges:
+                prompt += f"- Be careful with: {challenge}\n"
+        
+        return prompt
+    
+    def transcribe_image(self, image: Dict[str, Any], prompt: str) -> Dict[str, Any]:
+        """
+        Send a single page image to the LLM for transcription.
+        
+        Args:
+            image: Image data dictionary
+            prompt: Transcription prompt
+            
+        Returns:
+            LLM response
+        """
+        logger.info(f"Sending {image['path']} to LLM for transcription")
+        
+        payload = self._build_payload(prompt, [image])
+        
+        return self._post(payload)
+    
     def analyze_images(self, image_data: List[Dict[str, Any]], material_types: List[str]) -> Dict[str, Any]:
         """
         Send images to LLM for analysis.
@@ -69,28 +157,73 @@ class LLMInterface:
         logger.info(f"Sending {len(image_data)} images to LLM for analysis")
         
         prompt = self.create_analysis_prompt(material_types)
+        payload = self._build_payload(prompt, image_data)
+        
+        return self._post(payload)
+    
+    def analyze_images_structured(self, image_data: List[Dict[str, Any]], material_types: List[str]) -> Dict[str, Any]:
+        """
+        Send images to LLM for analysis, requesting a JSON response matching the analysis schema.
+        
+        The schema is enforced with response_format only if the model supports
+        structured outputs; otherwise the response is validated and repaired by
+        extract_structured_analysis.
+        
+        Args:
+            image_data: List of image data dictionaries
+            material_types: List of potential material types
+            
+        Returns:
+            LLM response
+        """
+        logger.info(f"Sending {len(image_data)} images to LLM for structured analysis")
+        
+        prompt = self.create_analysis_prompt(material_types) + (
+            "\n\nRespond only with a JSON object with " + STRUCTURED_FIELDS
+        )
+        payload = self._build_payload(prompt, image_data)
+        if self.structured_outputs:
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "material_analysis",
+                    "strict": True,
+                    "schema": build_analysis_schema(material_types)
+                }
+            }
         
+        return self._post(payload)
+    
+    def _build_payload(self, prompt: str, image_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Build the chat completion payload for a prompt and a list of images.
+        
+        Args:
+            prompt: Text prompt
+            image_data: List of image data dictionaries
+            
+        Returns:
+            Request payload
+        """
         # Prepare the message content
         content = [
             {"type": "text", "text": prompt}
         ]
         
-        # Add images to the content
+        # Add images to the content; raw image bytes are base64-encoded while streaming
         for img in image_data:
+            if "data" in img:
+                url = ImageData(img["data"])
+            else:
+                url = f"data:image/jpeg;base64,{img['base64']}"
             content.append({
                 "type": "image_url",
                 "image_url": {
-                    "url": f"data:image/jpeg;base64,{img['base64']}"
+                    "url": url
                 }
             })
         
-        # Prepare the API request
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        
-        payload = {
+        return {
             "model": self.model,
             "messages": [
                 {
@@ -98,17 +231,55 @@ class LLMInterface:
                     "content": content
                 }
             ],
-            "max_tokens": 1000
+            "max_tokens": self.max_tokens
+        }
+    
+    def _post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send a payload to the LLM API.
+        
+        Payloads with raw image data are streamed, encoding the images while
+        the body is written to the connection.
+        
+        Args:
+            payload: Request payload
+            
+        Returns:
+            Decoded JSON response
+        """
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
         }
         
+        with profiling.stage("payload_build"):
+            body = StreamingPayload(payload)
+        
+        if self.gzip:
+            # The compressed size is unknown up front, so the body is sent chunked
+            headers["Content-Encoding"] = "gzip"
+            data = self._counted(body.iter_gzip())
+        else:
+            data = body if body.images else body.to_bytes()
+            profiling.add_bytes("request_body", len(body))
+        
         try:
-            response = requests.post(self.api_url, headers=headers, json=payload)
-            response.raise_for_status()
+            with profiling.stage("http_request"):
+                response = requests.post(self.api_url, headers=headers, data=data)
+                response.raise_for_status()
+            profiling.add_bytes("response_body", len(response.content))
             return response.json()
         except Exception as e:
             logger.error(f"Error communicating with LLM API: {e}")
             raise
     
+    @staticmethod
+    def _counted(chunks):
+        """Pass through body chunks of unknown total size, recording their size."""
+        for chunk in chunks:
+            profiling.add_bytes("request_body", len(chunk))
+            yield chunk
+    
     def extract_analysis_text(self, response: Dict[str, Any]) -> str:
         """
         Extract the analysis text from the LLM response.
@@ -124,4 +295,53 @@ class LLMInterface:
         except (KeyError, IndexError) as e:
             logger.error(f"Error extracting analysis from LLM response: {e}")
             logger.debug(f"Response structure: {json.dumps(response, indent=2)}")
-            raise ValueError("Invalid response format from LLM API") 
\ No newline at end of file
+            raise ValueError("Invalid response format from LLM API")
+    
+    def extract_structured_analysis(self, response: Dict[str, Any], repair_attempts: int = 1) -> MaterialAnalysis:
+        """
+        Extract and validate the structured analysis from the LLM response.
+        
+        If validation fails, the invalid output is sent back to the LLM as a
+        text-only request asking for a corrected JSON object.
+        
+        Args:
+            response: LLM API response
+            repair_attempts: Maximum number of repair requests
+            
+        Returns:
+            Validated MaterialAnalysis
+        """
+        text = self.extract_analysis_text(response)
+        
+        for attempt in range(repair_attempts + 1):
+            try:
+                return MaterialAnalysis.from_json(text)
+            except AnalysisValidationError as e:
+                if attempt == repair_attempts:
+                    logger.error(f"Structured analysis failed validation: {e}")
+                    raise
+                logger.warning(f"Structured analysis failed validation, requesting repair: {e}")
+                text = self.extract_analysis_text(self._repair_analysis(text, str(e)))
+    
+    def _repair_analysis(self, text: str, error: str) -> Dict[str, Any]:
+        """
+        Ask the LLM to fix an analysis that failed validation.
+        
+        Args:
+            text: Invalid analysis output
+            error: Validation error message
+            
+        Returns:
+            LLM response
+        """
+        prompt = (
+            "The following JSON does not match the required schema.\n"
+            f"Validation errors: {error}\n\n"
+            f"{text}\n\n"
+            "Return only the corrected JSON object with " + STRUCTURED_FIELDS
+        )
+        payload = self._build_payload(prompt, [])
+        if self.structured_outputs:
+            payload["response_format"] = {"type": "json_object"}
+        
+        return self._post(payload)
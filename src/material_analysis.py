@@ -0,0 +1,237 @@
+import json
+import logging
+from dataclasses import dataclass, asdict, fields
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Allowed values for the handwritten/printed field
+SCRIPT_TYPES = ["handwritten", "printed", "both"]
+
+# Fields merged by majority vote across pages
+CATEGORICAL_FIELDS = ["language", "time_period", "material_type", "script_type"]
+
+# Fields that must agree between pages before sampling stops; the time
+# period is free text ("1920s", "early 20th century") and is left out
+CONVERGENCE_FIELDS = ["language", "material_type", "script_type"]
+
+class AnalysisValidationError(ValueError):
+    """Raised when a structured analysis does not match the expected schema."""
+
+@dataclass
+class MaterialAnalysis:
+    """Structured description of a document collection."""
+
+    language: str
+    time_period: str
+    material_type: str
+    script_type: str
+    format_layout: str
+    sequencing: str
+    dependencies: str
+    transcription_challenges: List[str]
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MaterialAnalysis":
+        """
+        Build and validate an analysis from a decoded JSON object.
+
+        Args:
+            data: Dictionary with the analysis fields
+
+        Returns:
+            Validated MaterialAnalysis instance
+        """
+        if not isinstance(data, dict):
+            raise AnalysisValidationError("Analysis must be a JSON object")
+
+        errors = []
+        values = {}
+        for field in fields(cls):
+            if field.name not in data:
+                errors.append(f"missing field '{field.name}'")
+                continue
+            value = data[field.name]
+            if field.name == "transcription_challenges":
+                if isinstance(value, str):
+                    value = [value]
+                if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+                    errors.append(f"field '{field.name}' must be a list of strings")
+                    continue
+                value = [v.strip() for v in value if v.strip()]
+            elif not isinstance(value, str) or not value.strip():
+                errors.append(f"field '{field.name}' must be a non-empty string")
+                continue
+            else:
+                value = value.strip()
+            values[field.name] = value
+
+        if "script_type" in values:
+            script_type = values["script_type"].lower()
+            if script_type not in SCRIPT_TYPES:
+                errors.append(f"field 'script_type' must be one of {SCRIPT_TYPES}")
+            values["script_type"] = script_type
+
+        if errors:
+            raise AnalysisValidationError("; ".join(errors))
+
+        return cls(**values)
+
+    @classmethod
+    def from_json(cls, text: str) -> "MaterialAnalysis":
+        """
+        Parse and validate an analysis from a JSON string.
+
+        Args:
+            text: JSON encoded analysis, optionally in a Markdown code fence
+
+        Returns:
+            Validated MaterialAnalysis instance
+        """
+        if isinstance(text, str):
+            text = text.strip()
+            # Models without structured outputs often wrap the JSON in a code fence
+            if text.startswith("```"):
+                text = text.split("\n", 1)[-1].rsplit("```", 1)[0]
+        try:
+            data = json.loads(text)
+        except (TypeError, json.JSONDecodeError) as e:
+            raise AnalysisValidationError(f"Invalid JSON: {e}")
+        return cls.from_dict(data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the analysis as a plain dictionary."""
+        return asdict(self)
+
+    def to_text(self) -> str:
+        """Render the analysis as a human readable description."""
+        challenges = "\n".join(f"  - {c}" for c in self.transcription_challenges)
+        return (
+            f"Language: {self.language}\n"
+            f"Time period: {self.time_period}\n"
+            f"Material type: {self.material_type}\n"
+            f"Handwritten/printed: {self.script_type}\n"
+            f"Format and layout: {self.format_layout}\n"
+            f"Sequencing: {self.sequencing}\n"
+            f"Dependencies: {self.dependencies}\n"
+            f"Transcription challenges:\n{challenges}"
+        )
+
+def build_analysis_schema(material_types: List[str]) -> Dict[str, Any]:
+    """
+    Build the JSON schema for the structured analysis response.
+
+    Args:
+        material_types: List of potential material types
+
+    Returns:
+        JSON schema dictionary
+    """
+    string = {"type": "string"}
+    return {
+        "type": "object",
+        "properties": {
+            "language": string,
+            "time_period": string,
+            "material_type": {
+                "type": "string",
+                "description": "One of: " + ", ".join(material_types) + ", or another type if none applies",
+            },
+            "script_type": {"type": "string", "enum": SCRIPT_TYPES},
+            "format_layout": string,
+            "sequencing": string,
+            "dependencies": string,
+            "transcription_challenges": {"type": "array", "items": string},
+        },
+        "required": [field.name for field in fields(MaterialAnalysis)],
+        "additionalProperties": False,
+    }
+
+def _normalize(value: str) -> str:
+    return " ".join(value.lower().split())
+
+def consensus(analyses: List[MaterialAnalysis]) -> Tuple[str, ...]:
+    """
+    Return the majority value of each categorical field.
+
+    Args:
+        analyses: Per-page analyses
+
+    Returns:
+        Tuple with the normalized majority value of each field in CATEGORICAL_FIELDS
+    """
+    return tuple(
+        Counter(_normalize(getattr(a, field)) for a in analyses).most_common(1)[0][0]
+        for field in CATEGORICAL_FIELDS
+    )
+
+def is_settled(
+    analyses: List[MaterialAnalysis],
+    min_share: float = 0.6,
+    margin: int = 2,
+    fields: List[str] = CONVERGENCE_FIELDS
+) -> bool:
+    """
+    Check whether every field has a clear majority across the pages.
+
+    A field is settled when its most frequent value holds more than min_share
+    of the pages and leads the runner-up by at least margin pages; ties are
+    never settled.
+
+    Args:
+        analyses: Per-page analyses
+        min_share: Fraction of the pages the leading value must exceed
+        margin: Number of pages by which the leading value must lead the runner-up
+        fields: Fields to check
+
+    Returns:
+        True if every field is settled
+    """
+    if not analyses:
+        return False
+    for field in fields:
+        counts = Counter(_normalize(getattr(a, field)) for a in analyses).most_common(2)
+        leader = counts[0][1]
+        runner_up = counts[1][1] if len(counts) > 1 else 0
+        if leader <= min_share * len(analyses) or leader - runner_up < margin:
+            return False
+    return True
+
+def merge_analyses(analyses: List[MaterialAnalysis]) -> MaterialAnalysis:
+    """
+    Merge per-page analyses into one description of the collection.
+
+    Categorical fields take the majority value, descriptive fields are taken
+    from the page that agrees most with the majority, and transcription
+    challenges are combined, most frequent first.
+
+    Args:
+        analyses: Per-page analyses
+
+    Returns:
+        Merged analysis
+    """
+    if not analyses:
+        raise ValueError("No analyses to merge")
+
+    majority = consensus(analyses)
+    agreement = [
+        sum(_normalize(getattr(a, field)) == value for field, value in zip(CATEGORICAL_FIELDS, majority))
+        for a in analyses
+    ]
+    representative = analyses[agreement.index(max(agreement))]
+
+    challenges = Counter()
+    spelling = {}
+    for a in analyses:
+        for challenge in a.transcription_challenges:
+            challenges[_normalize(challenge)] += 1
+            spelling.setdefault(_normalize(challenge), challenge)
+
+    values = representative.to_dict()
+    for field, value in zip(CATEGORICAL_FIELDS, majority):
+        values[field] = next(getattr(a, field) for a in analyses if _normalize(getattr(a, field)) == value)
+    values["transcription_challenges"] = [spelling[key] for key, _ in challenges.most_common()]
+
+    return MaterialAnalysis(**values)
@@ -0,0 +1,284 @@
+import io
+import logging
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, NamedTuple, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# File layout:
+#   header  MAGIC, version (uint16), reserved (uint16)
+#   blobs   encoded page and thumbnail bytes
+#   index   one entry per page: page offset, page length, thumbnail offset, thumbnail length
+#   footer  index offset, page count, MAGIC
+MAGIC = b"TKPS"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")
+INDEX_ENTRY = struct.Struct("<QIQI")
+FOOTER = struct.Struct("<QI4s")
+
+# File extension of packed page stores
+STORE_SUFFIX = ".pages"
+
+class PageStoreWriter:
+    """Writes encoded pages into a single packed page store file."""
+
+    def __init__(self, path: Path):
+        """
+        Initialize the writer.
+
+        Args:
+            path: Path of the store file to create
+        """
+        self.path = Path(path)
+        self._tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self._file = open(self._tmp_path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, 0))
+        self._index = []
+
+    def add_page(self, data: bytes, thumbnail: bytes = b"") -> int:
+        """
+        Append an encoded page.
+
+        Args:
+            data: Encoded page bytes
+            thumbnail: Encoded thumbnail bytes
+
+        Returns:
+            Index of the added page
+        """
+        page_offset = self._file.tell()
+        self._file.write(data)
+        thumb_offset = self._file.tell()
+        self._file.write(thumbnail)
+        self._index.append((page_offset, len(data), thumb_offset, len(thumbnail)))
+        return len(self._index) - 1
+
+    def close(self) -> None:
+        """Write the index and footer and move the store into place."""
+        if self._file.closed:
+            return
+        index_offset = self._file.tell()
+        for entry in self._index:
+            self._file.write(INDEX_ENTRY.pack(*entry))
+        self._file.write(FOOTER.pack(index_offset, len(self._index), MAGIC))
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        logger.info(f"Wrote {len(self._index)} pages to {self.path}")
+
+    def abort(self) -> None:
+        """Discard a partially written store."""
+        if not self._file.closed:
+            self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "PageStoreWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+class PageStore:
+    """Read-only, memory-mapped access to a packed page store."""
+
+    def __init__(self, path: Path):
+        """
+        Open a page store.
+
+        Args:
+            path: Path of the store file
+        """
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _ = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or len(self._mmap) < HEADER.size + FOOTER.size:
+            self._mmap.close()
+            raise ValueError(f"Not a page store: {self.path}")
+        if version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"Unsupported page store version {version}: {self.path}")
+
+        self._index_offset, self._count, _ = FOOTER.unpack_from(self._mmap, len(self._mmap) - FOOTER.size)
+        self._view = memoryview(self._mmap)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _entry(self, index: int):
+        if not 0 <= index < self._count:
+            raise IndexError(f"Page {index} out of range for {self.path} with {self._count} pages")
+        return INDEX_ENTRY.unpack_from(self._mmap, self._index_offset + index * INDEX_ENTRY.size)
+
+    def get_page(self, index: int) -> memoryview:
+        """
+        Return the encoded bytes of a page without copying.
+
+        Args:
+            index: Zero-based page index
+
+        Returns:
+            Memoryview over the page bytes
+        """
+        offset, length, _, _ = self._entry(index)
+        return self._view[offset:offset + length]
+
+    def get_thumbnail(self, index: int) -> memoryview:
+        """
+        Return the encoded thumbnail of a page without copying.
+
+        Args:
+            index: Zero-based page index
+
+        Returns:
+            Memoryview over the thumbnail bytes
+        """
+        _, _, offset, length = self._entry(index)
+        return self._view[offset:offset + length]
+
+    def close(self) -> None:
+        """
+        Close the store.
+
+        Memoryviews returned by get_page and get_thumbnail must be released first.
+        """
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "PageStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+class BufferReader(io.RawIOBase):
+    """Read-only file object over a buffer; reads copy only the requested bytes."""
+
+    def __init__(self, buffer: Union[bytes, memoryview]):
+        self._view = memoryview(buffer).cast("B")
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        chunk = self._view[self._position:self._position + len(target)]
+        target[:len(chunk)] = chunk
+        self._position += len(chunk)
+        return len(chunk)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: len(self._view)}[whence]
+        self._position = max(0, base + offset)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self) -> None:
+        self._view.release()
+        super().close()
+
+# Stores opened through open_store, shared by all page references, with the
+# identity of the file they were opened from
+_open_stores: Dict[Path, Tuple[Tuple[int, int, int], PageStore]] = {}
+_open_stores_lock = threading.Lock()
+
+def _close_unused(store: PageStore) -> None:
+    """Close a store unless pages are still in use; those keep the mapping alive until released."""
+    try:
+        store.close()
+    except BufferError:
+        pass
+
+def open_store(path: Path) -> PageStore:
+    """
+    Return a shared, already opened store for a path.
+
+    A store that was rewritten since it was opened, e.g. by converting the
+    PDF again, is opened again.
+
+    Args:
+        path: Path of the store file
+
+    Returns:
+        Opened PageStore
+    """
+    path = Path(path)
+    stat = os.stat(path)
+    identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _open_stores_lock:
+        cached = _open_stores.get(path)
+        if cached is not None and cached[0] == identity:
+            return cached[1]
+        store = PageStore(path)
+        _open_stores[path] = (identity, store)
+    if cached is not None:
+        _close_unused(cached[1])
+    return store
+
+def close_stores() -> None:
+    """Close all stores opened through open_store; stores with pages still in use stay mapped until released."""
+    with _open_stores_lock:
+        for _, store in _open_stores.values():
+            _close_unused(store)
+        _open_stores.clear()
+
+class PageRef(NamedTuple):
+    """Reference to a single page in a packed page store."""
+
+    store_path: Path
+    index: int
+
+    def read(self) -> memoryview:
+        """Return the encoded page bytes."""
+        return open_store(self.store_path).get_page(self.index)
+
+    def read_thumbnail(self) -> memoryview:
+        """Return the encoded thumbnail bytes."""
+        return open_store(self.store_path).get_thumbnail(self.index)
+
+    def __str__(self) -> str:
+        return f"{self.store_path}#page={self.index + 1}"
+
+# A page is either an image file or a page in a packed store
+PageSource = Union[Path, PageRef]
+
+def page_id(page: PageSource) -> str:
+    """
+    Return the canonical identifier of a page, independent of the working directory.
+
+    Args:
+        page: Path to the page image or reference to a packed page
+
+    Returns:
+        Absolute page path, or absolute packed page reference such as "/data/output/book.pages#page=3"
+    """
+    if isinstance(page, PageRef):
+        return str(PageRef(Path(page.store_path).resolve(), page.index))
+    return str(Path(page).resolve())
+
+def parse_page(page: str) -> PageSource:
+    """
+    Parse a page identifier created by str() of a page source.
+
+    Args:
+        page: Page path, or packed page reference such as "output/book.pages#page=3"
+
+    Returns:
+        Path to the page image or reference to a packed page
+    """
+    store, _, number = page.partition("#page=")
+    if number:
+        return PageRef(Path(store), int(number) - 1)
+    return Path(page)
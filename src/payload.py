@@ -0,0 +1,101 @@
+import base64
+import json
+import secrets
+import zlib
+from typing import Any, Iterator, List, Union
+
+# Bytes encoded per base64 chunk; a multiple of 3 so the chunks join without padding
+CHUNK_SIZE = 3 * 64 * 1024
+
+class ImageData:
+    """Image bytes embedded in a payload as a base64 data URL when it is streamed."""
+
+    __slots__ = ("data", "mime_type")
+
+    def __init__(self, data: Union[bytes, memoryview], mime_type: str = "image/jpeg"):
+        """
+        Wrap an encoded image.
+
+        Args:
+            data: Encoded image, not copied
+            mime_type: MIME type of the image
+        """
+        self.data = data
+        self.mime_type = mime_type
+
+    @property
+    def prefix(self) -> bytes:
+        return f"data:{self.mime_type};base64,".encode("ascii")
+
+    def encoded_size(self) -> int:
+        """Return the length of the data URL in bytes."""
+        return len(self.prefix) + 4 * ((memoryview(self.data).nbytes + 2) // 3)
+
+    def iter_encoded(self, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Yield the data URL in chunks, base64 encoding from slices of the image buffer."""
+        yield self.prefix
+        view = memoryview(self.data).cast("B")
+        for start in range(0, len(view), chunk_size):
+            yield base64.b64encode(view[start:start + chunk_size])
+
+class StreamingPayload:
+    """
+    JSON request body that is encoded while it is sent.
+
+    The payload is serialized once without its images; each image is then
+    base64-encoded chunk by chunk from its buffer as the body is written, so
+    no encoded copy of an image or of the whole body is ever held in memory.
+    Iterating yields the body in pieces and len() gives its exact size, so
+    requests sends it with a Content-Length header.
+    """
+
+    def __init__(self, payload: Any, chunk_size: int = CHUNK_SIZE):
+        """
+        Prepare a payload for streaming.
+
+        Args:
+            payload: JSON serializable payload; ImageData values become data URLs
+            chunk_size: Image bytes encoded per chunk, rounded down to a multiple of 3
+        """
+        self.chunk_size = max(3, chunk_size - chunk_size % 3)
+        self.images: List[ImageData] = []
+        marker = f"image-{secrets.token_hex(8)}"
+
+        def placeholder(value: Any) -> str:
+            if not isinstance(value, ImageData):
+                raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+            self.images.append(value)
+            return marker
+
+        text = json.dumps(payload, default=placeholder)
+        self.segments = [segment.encode("utf-8") for segment in text.split(marker)]
+
+    def __len__(self) -> int:
+        return sum(len(segment) for segment in self.segments) + sum(img.encoded_size() for img in self.images)
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self.segments[0]
+        for image, segment in zip(self.images, self.segments[1:]):
+            yield from image.iter_encoded(self.chunk_size)
+            yield segment
+
+    def iter_gzip(self, level: int = 6) -> Iterator[bytes]:
+        """
+        Yield the body gzip-compressed, for endpoints that accept Content-Encoding: gzip.
+
+        Args:
+            level: Compression level
+
+        Returns:
+            Iterator over the compressed body
+        """
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        for piece in self:
+            compressed = compressor.compress(piece)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    def to_bytes(self) -> bytes:
+        """Return the whole body at once."""
+        return b"".join(self)
@@ -1,25 +1,34 @@
 import logging
 from pathlib import Path
-from typing import List
+from typing import List, Tuple
 import tempfile
+import io
 from pdf2image import convert_from_path
 
+from . import profiling
+from .page_store import PageStoreWriter, PageRef, PageSource, STORE_SUFFIX
+
 logger = logging.getLogger(__name__)
 
 class PDFProcessor:
     """Class for processing PDF files into images."""
     
-    def __init__(self, output_dir: Path):
+    def __init__(self, output_dir: Path, packed: bool = False, thumbnail_size: Tuple[int, int] = (128, 128)):
         """
         Initialize the PDF processor.
         
         Args:
             output_dir: Directory to save extracted images
+            packed: Store the pages of each PDF in a single packed page store
+                instead of one JPEG file per page
+            thumbnail_size: Maximum thumbnail size stored with packed pages
         """
         self.output_dir = output_dir
         self.output_dir.mkdir(exist_ok=True)
+        self.packed = packed
+        self.thumbnail_size = thumbnail_size
         
-    def convert_pdf_to_images(self, pdf_path: Path) -> List[Path]:
+    def convert_pdf_to_images(self, pdf_path: Path) -> List[PageSource]:
         """
         Convert a PDF file to a list of images.
         
@@ -27,10 +36,14 @@ class PDFProcessor:
             pdf_path: Path to the PDF file
             
         Returns:
-            List of paths to the extracted images
+            List of paths to the extracted images, or page references
+            into the packed page store if packing is enabled
         """
         logger.info(f"Converting PDF to images: {pdf_path}")
         
+        if self.packed:
+            return self._convert_pdf_to_store(pdf_path)
+        
         try:
             # Create a subfolder for this PDF's images
             pdf_name = pdf_path.stem
@@ -38,13 +51,15 @@ class PDFProcessor:
             image_dir.mkdir(exist_ok=True)
             
             # Convert PDF to images
-            images = convert_from_path(pdf_path)
+            with profiling.stage("pdf_rasterize"):
+                images = convert_from_path(pdf_path)
             
             # Save images
             image_paths = []
             for i, image in enumerate(images):
                 image_path = image_dir / f"page_{i+1}.jpg"
-                image.save(image_path, "JPEG")
+                with profiling.stage("page_write"):
+                    image.save(image_path, "JPEG")
                 image_paths.append(image_path)
                 
             logger.info(f"Extracted {len(image_paths)} images from {pdf_path}")
@@ -52,4 +67,37 @@ class PDFProcessor:
             
         except Exception as e:
             logger.error(f"Error converting PDF to images: {e}")
-            raise 
\ No newline at end of file
+            raise
+    
+    def _convert_pdf_to_store(self, pdf_path: Path) -> List[PageRef]:
+        """
+        Convert a PDF file into a packed page store.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            
+        Returns:
+            List of references to the stored pages
+        """
+        store_path = self.output_dir / f"{pdf_path.stem}{STORE_SUFFIX}"
+        
+        try:
+            with profiling.stage("pdf_rasterize"):
+                images = convert_from_path(pdf_path)
+            
+            with PageStoreWriter(store_path) as writer:
+                for image in images:
+                    with profiling.stage("page_write"):
+                        page = io.BytesIO()
+                        image.save(page, "JPEG")
+                        image.thumbnail(self.thumbnail_size)
+                        thumbnail = io.BytesIO()
+                        image.save(thumbnail, "JPEG")
+                        writer.add_page(page.getbuffer(), thumbnail.getbuffer())
+            
+            logger.info(f"Packed {len(images)} pages from {pdf_path} into {store_path}")
+            return [PageRef(store_path, i) for i in range(len(images))]
+            
+        except Exception as e:
+            logger.error(f"Error converting PDF to page store: {e}")
+            raise
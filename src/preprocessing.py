@@ -0,0 +1,276 @@
+import hashlib
+import io
+import logging
+import os
+from dataclasses import dataclass, astuple
+from pathlib import Path
+from typing import Optional, Tuple
+
+from PIL import Image
+
+from .page_store import PageRef, PageSource
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Names accepted by PreprocessOptions.from_steps
+STEPS = ("crop", "deskew", "binarize")
+
+@dataclass(frozen=True)
+class PreprocessOptions:
+    """Options of the image preprocessing stage."""
+
+    crop_margins: bool = True
+    deskew: bool = True
+    binarize: bool = False
+    max_skew: float = 5.0
+    skew_step: float = 0.2
+    margin_padding: int = 12
+    binarize_window: int = 41
+    binarize_offset: float = 12.0
+
+    @classmethod
+    def from_steps(cls, steps: str) -> Optional["PreprocessOptions"]:
+        """
+        Build options from a comma-separated list of steps.
+
+        Args:
+            steps: Steps to enable, e.g. "crop,deskew"; empty disables preprocessing
+
+        Returns:
+            Preprocessing options, or None if no step is enabled
+        """
+        names = [step.strip().lower() for step in steps.split(",") if step.strip()]
+        unknown = set(names) - set(STEPS)
+        if unknown:
+            raise ValueError(f"Unknown preprocessing steps {sorted(unknown)}, expected {list(STEPS)}")
+        if not names:
+            return None
+        return cls(crop_margins="crop" in names, deskew="deskew" in names, binarize="binarize" in names)
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("Image preprocessing requires numpy: pip install numpy")
+
+def otsu_threshold(gray: "np.ndarray") -> float:
+    """
+    Compute the Otsu threshold separating ink from background.
+
+    Args:
+        gray: Grayscale image array
+
+    Returns:
+        Threshold gray value
+    """
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    weights = np.cumsum(hist)
+    means = np.cumsum(hist * np.arange(256))
+    total_weight, total_mean = weights[-1], means[-1]
+    background = total_weight - weights
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (total_mean * weights - means * total_weight) ** 2 / (weights * background)
+    if np.isnan(between[:-1]).all():
+        # A single gray value, e.g. a blank page: nothing counts as ink
+        return 0.0
+    return float(np.nanargmax(between[:-1]))
+
+def estimate_skew(gray: "np.ndarray", max_angle: float = 5.0, step: float = 0.2, max_points: int = 60000) -> float:
+    """
+    Estimate the skew of text lines with a projection profile search.
+
+    All candidate angles are evaluated at once: the ink pixel coordinates are
+    projected onto the rotated vertical axis and the angle with the sharpest
+    row histogram wins.
+
+    Args:
+        gray: Grayscale image array
+        max_angle: Largest skew in degrees to consider in either direction
+        step: Angle resolution in degrees
+        max_points: Maximum number of ink pixels used for the estimate
+
+    Returns:
+        Counter-clockwise skew in degrees; rotating the image by the negative angle straightens it
+    """
+    ys, xs = np.nonzero(gray < otsu_threshold(gray))
+    if len(ys) < 100:
+        return 0.0
+    if len(ys) > max_points:
+        keep = np.random.default_rng(0).choice(len(ys), max_points, replace=False)
+        ys, xs = ys[keep], xs[keep]
+
+    angles = np.arange(-max_angle, max_angle + step / 2, step)
+    radians = np.deg2rad(angles)[:, None]
+    # Row of every ink pixel after rotating the image by each candidate angle
+    rows = np.rint(ys[None, :] * np.cos(radians) + xs[None, :] * np.sin(radians)).astype(np.int64)
+    rows -= rows.min()
+    height = int(rows.max()) + 1
+    offsets = (np.arange(len(angles)) * height)[:, None]
+    profiles = np.bincount((rows + offsets).ravel(), minlength=len(angles) * height).reshape(len(angles), height)
+    scores = (profiles.astype(np.float64) ** 2).sum(axis=1)
+
+    return float(angles[int(np.argmax(scores))])
+
+def _edge_extent(dark: "np.ndarray") -> "np.ndarray":
+    """Return, for every row, the length of the dark run starting at the left edge."""
+    light = ~dark
+    return np.where(light.any(axis=1), light.argmax(axis=1), dark.shape[1])
+
+def content_box(gray: "np.ndarray", padding: int = 12, percentile: float = 95.0) -> Tuple[int, int, int, int]:
+    """
+    Find the content bounding box, excluding the scanner bed and empty margins.
+
+    Args:
+        gray: Grayscale image array
+        padding: Pixels kept around the content
+        percentile: Percentile of the per-row and per-column bed extents used as page edge
+
+    Returns:
+        Box as (left, top, right, bottom)
+    """
+    dark = gray < otsu_threshold(gray)
+    height, width = dark.shape
+    top, bottom, left, right = 0, height, 0, width
+
+    # Strip the scanner bed: dark regions connected to the image edges. Rows
+    # and columns that are bed from edge to edge are ignored.
+    left_extent, right_extent = _edge_extent(dark), _edge_extent(dark[:, ::-1])
+    crossing_rows = (left_extent + right_extent) < width
+    if crossing_rows.any():
+        left = int(np.percentile(left_extent[crossing_rows], percentile))
+        right = width - int(np.percentile(right_extent[crossing_rows], percentile))
+    top_extent, bottom_extent = _edge_extent(dark.T), _edge_extent(dark.T[:, ::-1])
+    crossing_cols = (top_extent + bottom_extent) < height
+    if crossing_cols.any():
+        top = int(np.percentile(top_extent[crossing_cols], percentile))
+        bottom = height - int(np.percentile(bottom_extent[crossing_cols], percentile))
+    if left >= right or top >= bottom:
+        top, bottom, left, right = 0, height, 0, width
+
+    # Trim empty page margins around the ink, ignoring isolated specks
+    page = dark[top:bottom, left:right]
+    min_ink = max(2, int(0.002 * max(page.shape)))
+    ink_rows = np.nonzero(page.sum(axis=1) >= min_ink)[0]
+    ink_cols = np.nonzero(page.sum(axis=0) >= min_ink)[0]
+    if len(ink_rows) and len(ink_cols):
+        top, bottom = top + ink_rows[0], top + ink_rows[-1] + 1
+        left, right = left + ink_cols[0], left + ink_cols[-1] + 1
+
+    return (
+        max(0, int(left) - padding), max(0, int(top) - padding),
+        min(width, int(right) + padding), min(height, int(bottom) + padding)
+    )
+
+def adaptive_binarize(gray: "np.ndarray", window: int = 41, offset: float = 12.0) -> "np.ndarray":
+    """
+    Binarize with a local mean threshold computed from an integral image.
+
+    Args:
+        gray: Grayscale image array
+        window: Side length of the local window in pixels
+        offset: Amount a pixel must be darker than the local mean to count as ink
+
+    Returns:
+        Binary image array with ink 0 and background 255
+    """
+    half = window // 2
+    window = 2 * half + 1
+    height, width = gray.shape
+    padded = np.pad(gray.astype(np.float64), half, mode="edge")
+    integral = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1))
+    integral[1:, 1:] = padded.cumsum(axis=0).cumsum(axis=1)
+    sums = (
+        integral[window:window + height, window:window + width] - integral[:height, window:window + width]
+        - integral[window:window + height, :width] + integral[:height, :width]
+    )
+    local_mean = sums / (window * window)
+    return np.where(gray < local_mean - offset, 0, 255).astype(np.uint8)
+
+def preprocess_image(img: Image.Image, options: PreprocessOptions) -> Image.Image:
+    """
+    Deskew, crop and optionally binarize a page image.
+
+    Args:
+        img: Page image
+        options: Preprocessing options
+
+    Returns:
+        Preprocessed image
+    """
+    _require_numpy()
+    img = img.convert("RGB") if img.mode not in ("RGB", "L") else img
+
+    if options.deskew:
+        # Estimate on a reduced copy, the angle does not depend on the scale
+        small = img.convert("L")
+        small.thumbnail((1000, 1000))
+        pixels = np.asarray(small)
+        # Only look at the page, the edges of a scanner bed would dominate the profile
+        left, top, right, bottom = content_box(pixels, padding=0)
+        inset = max(right - left, bottom - top) // 30
+        page = pixels[top + inset:bottom - inset, left + inset:right - inset]
+        angle = estimate_skew(page if page.size else pixels, options.max_skew, options.skew_step)
+        if abs(angle) >= options.skew_step / 2:
+            # Fill the exposed corners with the border color, usually the scanner bed
+            border = np.concatenate((pixels[0], pixels[-1], pixels[:, 0], pixels[:, -1]))
+            background = int(np.median(border))
+            fill = background if img.mode == "L" else (background,) * 3
+            img = img.rotate(-angle, resample=Image.BICUBIC, expand=True, fillcolor=fill)
+            logger.debug(f"Corrected skew of {angle:.2f} degrees")
+
+    if options.crop_margins:
+        img = img.crop(content_box(np.asarray(img.convert("L")), options.margin_padding))
+
+    if options.binarize:
+        binary = adaptive_binarize(np.asarray(img.convert("L")), options.binarize_window, options.binarize_offset)
+        img = Image.fromarray(binary, mode="L")
+
+    return img
+
+def preprocess_to_jpeg(
+    source: PageSource,
+    options: PreprocessOptions,
+    max_size: int = 1024,
+    cache_dir: Optional[Path] = None
+) -> bytes:
+    """
+    Preprocess a page and encode it as JPEG, using the cache if possible.
+
+    Runs in worker processes, so all arguments are picklable.
+
+    Args:
+        source: Path to the image or reference to a packed page
+        options: Preprocessing options
+        max_size: Maximum width and height of the result
+        cache_dir: Optional directory for cached results
+
+    Returns:
+        JPEG encoded page
+    """
+    data = source.read() if isinstance(source, PageRef) else Path(source).read_bytes()
+
+    cache_file = None
+    if cache_dir is not None:
+        key = hashlib.sha256(data)
+        key.update(repr((astuple(options), max_size)).encode())
+        cache_file = Path(cache_dir) / f"{key.hexdigest()}.jpg"
+        if cache_file.exists():
+            return cache_file.read_bytes()
+
+    with Image.open(io.BytesIO(data)) as img:
+        img = preprocess_image(img, options)
+        img.thumbnail((max_size, max_size), Image.LANCZOS)
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG")
+    encoded = buffer.getvalue()
+
+    if cache_file is not None:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        tmp_file.write_bytes(encoded)
+        os.replace(tmp_file, cache_file)
+
+    return encoded
@@ -0,0 +1,236 @@
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds
+DURATION_BUCKETS = [0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0]
+
+class StageProfiler:
+    """Collects per-stage durations and byte counters for a pipeline run."""
+
+    def __init__(self):
+        """Initialize an empty profiler."""
+        self._durations: Dict[str, List[float]] = defaultdict(list)
+        self._bytes: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time a block of code as one occurrence of a stage.
+
+        Args:
+            name: Stage name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float) -> None:
+        """
+        Record a single stage duration.
+
+        Args:
+            name: Stage name
+            seconds: Duration in seconds
+        """
+        with self._lock:
+            self._durations[name].append(seconds)
+
+    def add_bytes(self, name: str, count: int) -> None:
+        """
+        Add to a byte counter.
+
+        Args:
+            name: Counter name
+            count: Number of bytes
+        """
+        with self._lock:
+            self._bytes[name] += count
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Summarize the collected metrics.
+
+        Returns:
+            Dictionary with per-stage statistics, byte counters and peak RSS
+        """
+        with self._lock:
+            durations = {name: sorted(values) for name, values in self._durations.items()}
+            byte_counts = dict(self._bytes)
+
+        stages = {}
+        for name, values in durations.items():
+            buckets = {str(bound): sum(1 for v in values if v <= bound) for bound in DURATION_BUCKETS}
+            buckets["+Inf"] = len(values)
+            stages[name] = {
+                "count": len(values),
+                "total": sum(values),
+                "mean": sum(values) / len(values),
+                "min": values[0],
+                "max": values[-1],
+                "p50": _percentile(values, 0.50),
+                "p95": _percentile(values, 0.95),
+                "buckets": buckets
+            }
+
+        return {
+            "wall_time": time.perf_counter() - self._started,
+            "stages": stages,
+            "bytes": byte_counts,
+            "peak_rss_bytes": peak_rss_bytes()
+        }
+
+    def write_json(self, path: Path) -> None:
+        """
+        Write the report as JSON.
+
+        Args:
+            path: Output file path
+        """
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        logger.info(f"Metrics report written to {path}")
+
+    def write_prometheus(self, path: Path) -> None:
+        """
+        Write the report in the Prometheus text exposition format.
+
+        Args:
+            path: Output file path
+        """
+        report = self.report()
+        lines = [
+            "# HELP transkriptor_stage_seconds Duration of pipeline stages",
+            "# TYPE transkriptor_stage_seconds histogram"
+        ]
+        for name, stats in report["stages"].items():
+            for bound, count in stats["buckets"].items():
+                lines.append(f'transkriptor_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {count}')
+            lines.append(f'transkriptor_stage_seconds_sum{{stage="{name}"}} {stats["total"]}')
+            lines.append(f'transkriptor_stage_seconds_count{{stage="{name}"}} {stats["count"]}')
+
+        lines.append("# HELP transkriptor_bytes_total Bytes processed per counter")
+        lines.append("# TYPE transkriptor_bytes_total counter")
+        for name, count in report["bytes"].items():
+            lines.append(f'transkriptor_bytes_total{{counter="{name}"}} {count}')
+
+        if report["peak_rss_bytes"] is not None:
+            lines.append("# HELP transkriptor_peak_rss_bytes Peak resident set size")
+            lines.append("# TYPE transkriptor_peak_rss_bytes gauge")
+            lines.append(f"transkriptor_peak_rss_bytes {report['peak_rss_bytes']}")
+
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        logger.info(f"Prometheus metrics written to {path}")
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of a sorted list."""
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def peak_rss_bytes() -> Optional[int]:
+    """
+    Return the peak resident set size of the current process.
+
+    Returns:
+        Peak RSS in bytes, or None if not available on this platform
+    """
+    # On Linux, VmHWM follows reset_peak_rss, unlike ru_maxrss
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    try:
+        import resource
+        import sys
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def reset_peak_rss() -> bool:
+    """
+    Reset the peak resident set size of the current process to its current size.
+
+    A process inherits the peak RSS of its parent across fork and exec, so
+    measurements in a child process start with a reset. Only supported on Linux.
+
+    Returns:
+        True if the peak was reset
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return True
+
+# Profiler receiving measurements from the module-level helpers
+_active_profiler: Optional[StageProfiler] = None
+
+def enable(profiler: Optional[StageProfiler] = None) -> StageProfiler:
+    """
+    Activate a profiler for the module-level helpers.
+
+    Args:
+        profiler: Profiler to activate, a new one is created if omitted
+
+    Returns:
+        The active profiler
+    """
+    global _active_profiler
+    _active_profiler = profiler or StageProfiler()
+    return _active_profiler
+
+def disable() -> None:
+    """Deactivate the current profiler."""
+    global _active_profiler
+    _active_profiler = None
+
+def get_profiler() -> Optional[StageProfiler]:
+    """Return the active profiler, if any."""
+    return _active_profiler
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time a block of code on the active profiler; does nothing when profiling is disabled.
+
+    Args:
+        name: Stage name
+    """
+    profiler = _active_profiler
+    if profiler is None:
+        yield
+        return
+    with profiler.stage(name):
+        yield
+
+def add_bytes(name: str, count: int) -> None:
+    """
+    Add to a byte counter on the active profiler, if any.
+
+    Args:
+        name: Counter name
+        count: Number of bytes
+    """
+    profiler = _active_profiler
+    if profiler is not None:
+        profiler.add_bytes(name, count)
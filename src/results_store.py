@@ -0,0 +1,243 @@
+import json
+import logging
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    page_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    document TEXT,
+    page INTEGER,
+    language TEXT,
+    material_type TEXT,
+    metadata TEXT,
+    text TEXT,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    total_tokens INTEGER,
+    created REAL NOT NULL,
+    UNIQUE (page_id, stage)
+);
+CREATE INDEX IF NOT EXISTS pages_language ON pages (language);
+CREATE INDEX IF NOT EXISTS pages_material_type ON pages (material_type);
+CREATE INDEX IF NOT EXISTS pages_document ON pages (document, page);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(text, content='pages', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS pages_ai AFTER INSERT ON pages BEGIN
+    INSERT INTO pages_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_ad AFTER DELETE ON pages BEGIN
+    INSERT INTO pages_fts (pages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_au AFTER UPDATE ON pages BEGIN
+    INSERT INTO pages_fts (pages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO pages_fts (rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+# Columns returned by queries, without the page text
+COLUMNS = [
+    "page_id", "stage", "document", "page", "language", "material_type",
+    "metadata", "prompt_tokens", "completion_tokens", "total_tokens", "created"
+]
+
+UPSERT = """
+INSERT INTO pages (page_id, stage, document, page, language, material_type, metadata, text,
+                   prompt_tokens, completion_tokens, total_tokens, created)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (page_id, stage) DO UPDATE SET
+    document = excluded.document, page = excluded.page, language = excluded.language,
+    material_type = excluded.material_type, metadata = excluded.metadata, text = excluded.text,
+    prompt_tokens = excluded.prompt_tokens, completion_tokens = excluded.completion_tokens,
+    total_tokens = excluded.total_tokens, created = excluded.created
+"""
+
+def page_location(page: str) -> Tuple[str, Optional[int]]:
+    """
+    Derive the document name and page number from a page identifier.
+
+    Args:
+        page: Page path, or packed page reference such as "output/book.pages#page=3"
+
+    Returns:
+        Tuple of the document name and the page number, if known
+    """
+    store, _, number = page.partition("#page=")
+    if number:
+        return Path(store).stem, int(number)
+
+    path = Path(page)
+    # Pages extracted from PDFs are stored as <output>/<document>/page_<n>.jpg
+    match = re.fullmatch(r"page_(\d+)", path.stem)
+    if match:
+        return path.parent.name, int(match.group(1))
+    return path.stem, None
+
+class ResultsStore:
+    """
+    SQLite results store with full-text search over the page texts.
+
+    Records are buffered and written in batches. A page has one record per
+    stage; writing it again replaces the previous record.
+    """
+
+    def __init__(self, path: Path, batch_size: int = 500):
+        """
+        Open or create a results store.
+
+        Args:
+            path: Path of the SQLite database
+            batch_size: Number of buffered records that triggers a write
+        """
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self._pending: List[tuple] = []
+        self._db = sqlite3.connect(self.path, timeout=30.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def add(
+        self,
+        page_id: str,
+        text: str,
+        stage: str = "transcription",
+        metadata: Optional[Dict[str, Any]] = None,
+        usage: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Buffer a record, writing the buffer once it reaches the batch size.
+
+        Args:
+            page_id: Page identifier
+            text: Page text
+            stage: Pipeline stage that produced the text
+            metadata: Optional metadata; language and material_type are indexed
+            usage: Optional token usage reported by the LLM API
+        """
+        metadata = metadata or {}
+        usage = usage or {}
+        document, page = page_location(page_id)
+        self._pending.append((
+            page_id, stage, document, page,
+            metadata.get("language"), metadata.get("material_type"),
+            json.dumps(metadata), text,
+            usage.get("prompt_tokens"), usage.get("completion_tokens"), usage.get("total_tokens"),
+            time.time()
+        ))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered records in a single transaction."""
+        if not self._pending:
+            return
+        with self._db:
+            self._db.executemany(UPSERT, self._pending)
+        logger.info(f"Wrote {len(self._pending)} records to {self.path}")
+        self._pending = []
+
+    def compact(self) -> None:
+        """Merge the full-text index segments and reclaim the space of replaced records."""
+        self.flush()
+        with self._db:
+            self._db.execute("INSERT INTO pages_fts (pages_fts) VALUES ('optimize')")
+        self._db.execute("VACUUM")
+        logger.info(f"Compacted {self.path}")
+
+    def search(self, query: str, limit: int = 20, **filters: Any) -> List[Dict[str, Any]]:
+        """
+        Full-text search over the page texts, best matches first.
+
+        Args:
+            query: FTS5 query, e.g. "anno AND domini" or "inventar*"
+            limit: Maximum number of results
+            **filters: Column filters, e.g. language="Latin"
+
+        Returns:
+            List of matching records with a text snippet
+        """
+        self.flush()
+        where, params = self._filters(filters, prefix="p.")
+        sql = (
+            "SELECT " + ", ".join(f"p.{c}" for c in COLUMNS) + ", "
+            "snippet(pages_fts, 0, '[', ']', '...', 12) "
+            "FROM pages_fts JOIN pages p ON p.id = pages_fts.rowid "
+            "WHERE pages_fts MATCH ?" + "".join(f" AND {w}" for w in where) +
+            " ORDER BY bm25(pages_fts) LIMIT ?"
+        )
+        rows = self._db.execute(sql, [query] + params + [limit]).fetchall()
+        return [dict(self._record(row[:-1]), snippet=row[-1]) for row in rows]
+
+    def query(self, limit: Optional[int] = None, include_text: bool = False, **filters: Any) -> List[Dict[str, Any]]:
+        """
+        Select records by column values, in document and page order.
+
+        Args:
+            limit: Maximum number of results
+            include_text: Include the page text in the results
+            **filters: Column filters, e.g. language="Latin", stage="transcription"
+
+        Returns:
+            List of matching records
+        """
+        self.flush()
+        where, params = self._filters(filters)
+        columns = COLUMNS + (["text"] if include_text else [])
+        sql = "SELECT " + ", ".join(columns) + " FROM pages"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY document, page, page_id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [self._record(row, columns) for row in self._db.execute(sql, params)]
+
+    def count(self, **filters: Any) -> int:
+        """
+        Count records.
+
+        Args:
+            **filters: Column filters
+
+        Returns:
+            Number of matching records
+        """
+        self.flush()
+        where, params = self._filters(filters)
+        sql = "SELECT COUNT(*) FROM pages" + (" WHERE " + " AND ".join(where) if where else "")
+        return self._db.execute(sql, params).fetchone()[0]
+
+    def close(self) -> None:
+        """Write the buffered records and close the database."""
+        self.flush()
+        self._db.close()
+
+    def __enter__(self) -> "ResultsStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @staticmethod
+    def _filters(filters: Dict[str, Any], prefix: str = "") -> Tuple[List[str], List[Any]]:
+        where, params = [], []
+        for column, value in filters.items():
+            if value is None:
+                continue
+            if column not in COLUMNS:
+                raise ValueError(f"Unknown column: {column}")
+            where.append(f"{prefix}{column} = ?")
+            params.append(value)
+        return where, params
+
+    @staticmethod
+    def _record(row: tuple, columns: List[str] = COLUMNS) -> Dict[str, Any]:
+        record = dict(zip(columns, row))
+        record["metadata"] = json.loads(record["metadata"]) if record["metadata"] else {}
+        return record
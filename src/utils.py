@@ -16,7 +16,7 @@ def validate_input_path(input_path: Optional[str] = None) -> Path:
     Returns:
         Path object for the validated input path
     """
-    from config import INPUT_DIR
+    from config import INPUT_DIR, ensure_directories
     
     if input_path:
         path = Path(input_path)
@@ -26,6 +26,7 @@ def validate_input_path(input_path: Optional[str] = None) -> Path:
         return path
     
     logger.info(f"Using default input directory: {INPUT_DIR}")
+    ensure_directories()
     return INPUT_DIR
 
 def get_file_list(directory: Path, extensions: List[str]) -> List[Path]:
@@ -93,4 +94,22 @@ def sample_images(image_paths: List[Path], sample_size: int = 5) -> List[Path]:
     # Randomly sample 3 more images
     random_images = random.sample(remaining_images, min(3, len(remaining_images)))
     
-    return first_images + random_images 
\ No newline at end of file
+    return first_images + random_images
+
+def sampling_order(image_paths: List[Path]) -> List[Path]:
+    """
+    Order images for incremental sampling:
+    - First 2 images alphabetically
+    - All remaining images in random order
+    
+    Args:
+        image_paths: List of paths to images
+    
+    Returns:
+        List of image paths in sampling order
+    """
+    sorted_paths = sorted(image_paths, key=str)
+    remaining = sorted_paths[2:]
+    random.shuffle(remaining)
+    
+    return sorted_paths[:2] + remaining
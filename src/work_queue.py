@@ -0,0 +1,248 @@
+import json
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_expires);
+"""
+
+class Task(NamedTuple):
+    """A leased unit of work."""
+
+    task_id: str
+    payload: Dict[str, Any]
+    attempts: int
+
+class WorkQueue:
+    """
+    SQLite-backed work queue with leases shared by processes on one or more machines.
+
+    Workers lease tasks for a visibility timeout and renew the lease with
+    heartbeats. Tasks whose lease expires are handed out again, and the
+    first completed result of a task is kept.
+    """
+
+    def __init__(self, path: Path, visibility_timeout: float = 300.0, max_attempts: int = 3):
+        """
+        Open or create a work queue.
+
+        Args:
+            path: Path of the SQLite queue file
+            visibility_timeout: Seconds a lease lasts without a heartbeat
+            max_attempts: Number of leases after which a task is marked as failed
+        """
+        self.path = Path(path)
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+
+        db = self._connect()
+        try:
+            db.executescript(SCHEMA)
+        finally:
+            db.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        # WAL needs shared memory and does not work on network filesystems, where
+        # workers on other machines open the queue; use a rollback journal instead
+        db.execute("PRAGMA journal_mode=DELETE")
+        return db
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run statements in a write transaction on a fresh connection."""
+        db = self._connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+        finally:
+            db.close()
+
+    def enqueue(self, tasks: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        Add tasks; tasks that are already queued are left unchanged.
+
+        Args:
+            tasks: List of (task ID, payload) pairs
+
+        Returns:
+            Number of newly added tasks
+        """
+        now = time.time()
+        with self._transaction() as db:
+            before = db.total_changes
+            db.executemany(
+                "INSERT OR IGNORE INTO tasks (task_id, payload, updated) VALUES (?, ?, ?)",
+                [(task_id, json.dumps(payload), now) for task_id, payload in tasks]
+            )
+            added = db.total_changes - before
+
+        logger.info(f"Enqueued {added} of {len(tasks)} tasks in {self.path}")
+        return added
+
+    def lease(self, worker_id: str, limit: int = 1) -> List[Task]:
+        """
+        Lease pending tasks and tasks whose lease has expired.
+
+        Args:
+            worker_id: ID of the leasing worker
+            limit: Maximum number of tasks to lease
+
+        Returns:
+            List of leased tasks
+        """
+        now = time.time()
+        with self._transaction() as db:
+            # Give up on tasks that keep stalling
+            db.execute(
+                "UPDATE tasks SET status = 'failed', error = 'lease expired too often', updated = ? "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts)
+            )
+            rows = db.execute(
+                "SELECT task_id, payload, attempts FROM tasks "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY seq LIMIT ?",
+                (now, limit)
+            ).fetchall()
+            db.executemany(
+                "UPDATE tasks SET status = 'leased', owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated = ? WHERE task_id = ?",
+                [(worker_id, now + self.visibility_timeout, now, row[0]) for row in rows]
+            )
+
+        return [Task(task_id, json.loads(payload), attempts + 1) for task_id, payload, attempts in rows]
+
+    def heartbeat(self, worker_id: str, task_ids: List[str]) -> int:
+        """
+        Extend the leases a worker still holds.
+
+        Args:
+            worker_id: ID of the worker
+            task_ids: IDs of the tasks being processed
+
+        Returns:
+            Number of renewed leases
+        """
+        if not task_ids:
+            return 0
+        now = time.time()
+        with self._transaction() as db:
+            before = db.total_changes
+            db.executemany(
+                "UPDATE tasks SET lease_expires = ?, updated = ? "
+                "WHERE task_id = ? AND owner = ? AND status = 'leased'",
+                [(now + self.visibility_timeout, now, task_id, worker_id) for task_id in task_ids]
+            )
+            return db.total_changes - before
+
+    def complete(self, task_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        """
+        Store the result of a task; results for already completed tasks are ignored.
+
+        Args:
+            task_id: ID of the task
+            worker_id: ID of the worker
+            result: Task result
+
+        Returns:
+            True if this result was stored
+        """
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE tasks SET status = 'done', owner = ?, result = ?, error = NULL, updated = ? "
+                "WHERE task_id = ? AND status != 'done'",
+                (worker_id, json.dumps(result), time.time(), task_id)
+            )
+            stored = cursor.rowcount == 1
+
+        if not stored:
+            logger.info(f"Ignoring duplicate result for task {task_id} from {worker_id}")
+        return stored
+
+    def fail(self, task_id: str, worker_id: str, error: str) -> None:
+        """
+        Release a task after an error, marking it as failed after max_attempts.
+
+        Args:
+            task_id: ID of the task
+            worker_id: ID of the worker
+            error: Error description
+        """
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "owner = NULL, lease_expires = NULL, error = ?, updated = ? "
+                "WHERE task_id = ? AND owner = ? AND status = 'leased'",
+                (self.max_attempts, error, time.time(), task_id, worker_id)
+            )
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Count tasks by status.
+
+        Returns:
+            Dictionary mapping status to number of tasks
+        """
+        db = self._connect()
+        try:
+            counts = dict(db.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+        finally:
+            db.close()
+        return {status: counts.get(status, 0) for status in ("pending", "leased", "done", "failed")}
+
+    def is_finished(self) -> bool:
+        """Return True when no task is pending or leased."""
+        stats = self.stats()
+        return stats["pending"] == 0 and stats["leased"] == 0
+
+    def results(self) -> List[Dict[str, Any]]:
+        """
+        Return the results of completed tasks in enqueue order.
+
+        Returns:
+            List of task results
+        """
+        db = self._connect()
+        try:
+            rows = db.execute("SELECT result FROM tasks WHERE status = 'done' ORDER BY seq").fetchall()
+        finally:
+            db.close()
+        return [json.loads(row[0]) for row in rows]
+
+    def failures(self) -> Dict[str, Optional[str]]:
+        """
+        Return the failed tasks.
+
+        Returns:
+            Dictionary mapping task ID to the last error
+        """
+        db = self._connect()
+        try:
+            rows = db.execute("SELECT task_id, error FROM tasks WHERE status = 'failed' ORDER BY seq").fetchall()
+        finally:
+            db.close()
+        return dict(rows)
@@ -92,4 +92,147 @@ def test_process_input_no_files(agent, mock_components, tmp_path):
             
             # Execute and assert
             with pytest.raises(FileNotFoundError):
-                agent.process_input(str(tmp_path)) 
\ No newline at end of file
+                agent.process_input(str(tmp_path)) 
+
+def test_process_input_structured(mock_components, tmp_path):
+    """Test processing input with structured analysis enabled."""
+    from src.material_analysis import MaterialAnalysis
+    
+    agent = TranscriptionAgent(structured=True, **mock_components)
+    image_path = tmp_path / "test.jpg"
+    analysis = MaterialAnalysis(
+        language="German", time_period="1920s", material_type="Diaries",
+        script_type="handwritten", format_layout="Single column", sequencing="Dated entries",
+        dependencies="None", transcription_challenges=["Kurrent script"]
+    )
+    
+    mock_components["image_analyzer"].sample_images.return_value = [image_path]
+    mock_components["image_analyzer"].prepare_images_for_llm.return_value = [{"path": str(image_path), "base64": "data"}]
+    mock_components["llm_interface"].extract_structured_analysis.return_value = analysis
+    
+    with patch("src.agent.validate_input_path", return_value=tmp_path):
+        with patch("src.agent.get_file_list") as mock_get_files:
+            mock_get_files.side_effect = [[], [image_path]]
+            result = agent.process_input(str(tmp_path))
+    
+    assert result["structured_analysis"]["language"] == "German"
+    assert "Kurrent script" in result["analysis"]
+    mock_components["llm_interface"].analyze_images_structured.assert_called_once()
+    mock_components["llm_interface"].analyze_images.assert_not_called()
+
+def test_transcribe_page(agent, mock_components):
+    """Test transcribing a single page."""
+    page = Path("page_1.jpg")
+    analysis = {"language": "Latin"}
+    mock_components["image_analyzer"].prepare_images_for_llm.return_value = [{"path": str(page), "base64": "data"}]
+    mock_components["llm_interface"].transcribe_image.return_value = {
+        "choices": [{"message": {"content": "Anno domini"}}],
+        "usage": {"total_tokens": 10}
+    }
+    mock_components["llm_interface"].extract_analysis_text.return_value = "Anno domini"
+    
+    result = agent.transcribe_page(page, analysis)
+    
+    assert result == {"page": str(page.resolve()), "text": "Anno domini", "usage": {"total_tokens": 10}}
+    mock_components["llm_interface"].create_transcription_prompt.assert_called_once_with(analysis)
+
+def test_transcribe_prepares_pages_in_batches(agent, mock_components, tmp_path):
+    """Test that pages are prepared in batches before they are transcribed."""
+    pages = [tmp_path / f"page_{i}.jpg" for i in range(5)]
+    mock_components["image_analyzer"].prepare_images_for_llm.side_effect = lambda paths: [
+        {"path": str(path), "base64": "data"} for path in paths
+    ]
+    mock_components["llm_interface"].transcribe_image.return_value = {"usage": {}}
+    mock_components["llm_interface"].extract_analysis_text.return_value = "text"
+    
+    with patch("src.agent.validate_input_path", return_value=tmp_path):
+        with patch("src.agent.get_file_list") as mock_get_files:
+            mock_get_files.side_effect = [[], pages]
+            results = agent.transcribe(str(tmp_path), batch_size=2)
+    
+    assert [result["page"] for result in results] == [str(page) for page in pages]
+    assert mock_components["image_analyzer"].prepare_images_for_llm.call_count == 3
+
+def test_transcribe_continues_after_failed_page(agent, mock_components, tmp_path):
+    """Test that a page that cannot be prepared is reported as failed without losing the other pages."""
+    pages = [tmp_path / f"page_{i}.jpg" for i in range(3)]
+    mock_components["image_analyzer"].prepare_images_for_llm.side_effect = lambda paths: [
+        {"path": str(path), "base64": "data"} for path in paths if path != pages[1]
+    ]
+    mock_components["llm_interface"].transcribe_image.return_value = {"usage": {}}
+    mock_components["llm_interface"].extract_analysis_text.return_value = "text"
+    
+    with patch("src.agent.validate_input_path", return_value=tmp_path):
+        with patch("src.agent.get_file_list") as mock_get_files:
+            mock_get_files.side_effect = [[], pages]
+            results = agent.transcribe(str(tmp_path), batch_size=3)
+    
+    assert [result.get("text") for result in results] == ["text", None, "text"]
+    assert results[1]["page"] == str(pages[1])
+    assert "Could not prepare" in results[1]["error"]
+
+def make_analysis(language, challenge="Faded ink", time_period="1920s"):
+    """Build a structured analysis for a page."""
+    from src.material_analysis import MaterialAnalysis
+    
+    return MaterialAnalysis(
+        language=language, time_period=time_period, material_type="Diaries", script_type="handwritten",
+        format_layout="Single column", sequencing="Dated entries", dependencies="None",
+        transcription_challenges=[challenge]
+    )
+
+def run_adaptive(agent, mock_components, tmp_path, analyses, **kwargs):
+    """Run adaptive processing over ten pages with the given per-page analyses."""
+    pages = [tmp_path / f"page_{i:02d}.jpg" for i in range(10)]
+    mock_components["image_analyzer"].prepare_images_for_llm.side_effect = lambda paths: [{"path": str(paths[0]), "base64": "data"}]
+    mock_components["llm_interface"].analyze_images_structured.return_value = {"usage": {"total_tokens": 5}}
+    mock_components["llm_interface"].extract_structured_analysis.side_effect = analyses
+    
+    with patch("src.agent.validate_input_path", return_value=tmp_path):
+        with patch("src.agent.get_file_list") as mock_get_files:
+            mock_get_files.side_effect = [[], pages]
+            return agent.process_input_adaptive(str(tmp_path), **kwargs)
+
+def test_process_input_adaptive_stops_when_stable(agent, mock_components, tmp_path):
+    """Test that uniform collections stop after the first round."""
+    analyses = [make_analysis("German") for _ in range(10)]
+    
+    result = run_adaptive(agent, mock_components, tmp_path, analyses, min_samples=2, max_samples=10, batch_size=2)
+    
+    assert result["converged"]
+    assert result["rounds"] == 1
+    assert len(result["sampled_images"]) == 2
+    assert result["usage"] == {"total_tokens": 10}
+    assert result["structured_analysis"]["language"] == "German"
+
+def test_process_input_adaptive_continues_on_mixed_material(agent, mock_components, tmp_path):
+    """Test that changing descriptions keep sampling up to max_samples."""
+    languages = ["German", "Latin", "Latin", "German", "German", "Latin", "German", "German"]
+    analyses = [make_analysis(language, f"Challenge {i % 2}") for i, language in enumerate(languages)]
+    
+    result = run_adaptive(agent, mock_components, tmp_path, analyses, min_samples=2, max_samples=6, batch_size=2)
+    
+    assert not result["converged"]
+    assert len(result["sampled_images"]) == 6
+    assert result["structured_analysis"]["language"] == "German"
+    assert result["structured_analysis"]["transcription_challenges"] == ["Challenge 0", "Challenge 1"]
+
+def test_process_input_adaptive_tie_is_not_converged(agent, mock_components, tmp_path):
+    """Test that a 50/50 collection with changing periods never counts as converged."""
+    languages = ["German", "Latin", "Latin", "German"]
+    analyses = [make_analysis(language, time_period=period)
+                for language, period in zip(languages, ["1650", "1720s", "18th century", "1900s"])]
+    
+    result = run_adaptive(agent, mock_components, tmp_path, analyses, min_samples=2, max_samples=4, batch_size=2)
+    
+    assert not result["converged"]
+    assert result["rounds"] == 2
+
+def test_process_input_adaptive_latency_budget(agent, mock_components, tmp_path):
+    """Test that no new round is started once the latency budget is used up."""
+    analyses = [make_analysis("German"), make_analysis("Latin")] * 5
+    
+    result = run_adaptive(agent, mock_components, tmp_path, analyses, max_samples=10, batch_size=2, latency_budget=0)
+    
+    assert result["rounds"] == 1
+    assert not result["converged"]
@@ -0,0 +1,45 @@
+import json
+import pytest
+import requests
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.mock_llm_server import MockLLMServer, MOCK_ANALYSIS
+from benchmarks.run import compare_results
+
+def test_generate_scan_corpus_is_reproducible(tmp_path):
+    """Test that the same seed produces identical scans."""
+    first = generate_corpus(tmp_path / "a", documents=1, pages=2, dpi=30, kind="scan", seed=1)
+    second = generate_corpus(tmp_path / "b", documents=1, pages=2, dpi=30, kind="scan", seed=1)
+    
+    assert len(first) == 2
+    assert [p.read_bytes() for p in first] == [p.read_bytes() for p in second]
+
+def test_generate_pdf_corpus(tmp_path):
+    """Test generating multi-page PDFs."""
+    paths = generate_corpus(tmp_path, documents=2, pages=3, dpi=30, kind="pdf")
+    
+    assert [p.name for p in paths] == ["document_001.pdf", "document_002.pdf"]
+    assert paths[0].read_bytes().count(b"/Type /Page\n") == 3
+
+def test_generate_corpus_invalid_kind(tmp_path):
+    """Test that unknown corpus kinds are rejected."""
+    with pytest.raises(ValueError):
+        generate_corpus(tmp_path, kind="tiff")
+
+def test_mock_server_counts_requests():
+    """Test that the mock server answers and counts uploaded bytes."""
+    with MockLLMServer() as server:
+        body = json.dumps({"model": "mock", "response_format": {"type": "json_object"}})
+        response = requests.post(server.url, data=body)
+    
+    assert json.loads(response.json()["choices"][0]["message"]["content"]) == MOCK_ANALYSIS
+    assert server.requests == 1
+    assert server.bytes_received == len(body)
+
+def test_compare_results_detects_regression():
+    """Test that throughput drops beyond the threshold are reported."""
+    def result(pages_per_sec):
+        return {"stages": {"image": {"pages_per_sec": pages_per_sec, "peak_rss_bytes": 1, "bytes_uploaded": 0}}}
+    
+    assert compare_results(result(10.0), result(9.5)) == []
+    assert len(compare_results(result(10.0), result(8.0))) == 1
@@ -0,0 +1,60 @@
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from src.distributed import Coordinator, Worker, encode_page, decode_page, start_local_workers
+from src.page_store import PageRef
+from src.work_queue import WorkQueue
+
+class FakeAgent:
+    """Agent that transcribes a page as its file name."""
+    
+    def transcribe_page(self, page, analysis=None):
+        return {"page": str(page), "text": Path(str(page)).stem}
+
+def test_encode_decode_page():
+    """Test that pages survive the round trip through a task payload as absolute paths."""
+    assert decode_page(encode_page(Path("data/page_1.jpg"))) == Path.cwd() / "data" / "page_1.jpg"
+    assert decode_page(encode_page(PageRef(Path("output/book.pages"), 3))) == PageRef(Path.cwd() / "output" / "book.pages", 3)
+
+def test_worker_processes_queue(tmp_path):
+    """Test that a worker completes all pages and records failures."""
+    queue = WorkQueue(tmp_path / "queue.db", max_attempts=1)
+    Coordinator(queue).submit([Path("page_1.jpg"), Path("page_2.jpg")])
+    agent = MagicMock()
+    agent.transcribe_page.side_effect = [{"text": "one"}, RuntimeError("API error")]
+    
+    completed = Worker(queue, agent, worker_id="worker-a").run()
+    
+    assert completed == 1
+    assert queue.results() == [{"text": "one", "page": str(Path("page_1.jpg").resolve())}]
+    assert queue.failures() == {str(Path("page_2.jpg").resolve()): "API error"}
+
+def test_submit_uses_canonical_page_ids(tmp_path, monkeypatch):
+    """Test that the same page submitted through a relative and an absolute path is queued once."""
+    monkeypatch.chdir(tmp_path)
+    queue = WorkQueue(tmp_path / "queue.db")
+    coordinator = Coordinator(queue)
+    
+    assert coordinator.submit([Path("page_1.jpg"), PageRef(Path("book.pages"), 0)]) == 2
+    assert coordinator.submit([tmp_path / "page_1.jpg", PageRef(tmp_path / "book.pages", 0)]) == 0
+    
+    Worker(queue, FakeAgent(), worker_id="worker-a").run()
+    
+    assert [result["page"] for result in queue.results()] == [
+        str(tmp_path / "page_1.jpg"), str(tmp_path / "book.pages#page=1")
+    ]
+
+def test_local_workers(tmp_path):
+    """Test transcribing a queue with several local worker processes."""
+    queue = WorkQueue(tmp_path / "queue.db")
+    coordinator = Coordinator(queue)
+    pages = [Path(f"page_{i}.jpg") for i in range(20)]
+    coordinator.submit(pages)
+    
+    processes = start_local_workers(queue, FakeAgent, num_workers=3)
+    stats = coordinator.wait(poll_interval=0.05, processes=processes)
+    for process in processes:
+        process.join()
+    
+    assert stats["done"] == 20
+    assert [result["text"] for result in coordinator.results()] == [page.stem for page in pages]
@@ -0,0 +1,95 @@
+import random
+import pytest
+from unittest.mock import MagicMock
+
+from src.evaluation import GroundTruthStore, PromptEvaluator, ResponseCache, cer, edit_distance, wer
+
+def reference_distance(a, b):
+    """Textbook dynamic programming edit distance."""
+    previous = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        current = [i]
+        for j, y in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != y)))
+        previous = current
+    return previous[-1]
+
+def test_edit_distance_matches_reference():
+    """Test the bit-parallel distance against dynamic programming."""
+    rng = random.Random(0)
+    for _ in range(500):
+        a = "".join(rng.choice("abc ") for _ in range(rng.randint(0, 80)))
+        b = "".join(rng.choice("abc ") for _ in range(rng.randint(0, 80)))
+
+        assert edit_distance(a, b) == reference_distance(a, b)
+        assert edit_distance(a.split(), b.split()) == reference_distance(a.split(), b.split())
+
+def test_edit_distance_examples():
+    """Test known distances."""
+    assert edit_distance("kitten", "sitting") == 3
+    assert edit_distance("", "abc") == 3
+    assert edit_distance("same", "same") == 0
+
+def test_error_rates():
+    """Test character and word error rates."""
+    assert cer("anno domini", "anno  domini\n") == 0.0
+    assert cer("abcd", "abcx") == 0.25
+    assert wer("anno domini 1650", "anno domino 1650") == pytest.approx(1 / 3)
+
+def test_ground_truth_store(tmp_path):
+    """Test exporting drafts and detecting corrections."""
+    store = GroundTruthStore(tmp_path)
+
+    assert store.add("output/book/page_2.jpg", "draft text")
+    assert store.add("output/letters.pages#page=1", "other draft")
+    assert not store.add("output/book/page_2.jpg", "new draft")
+
+    assert store.items() == []
+    (tmp_path / "book_page_0002.txt").write_text("corrected text")
+
+    reopened = GroundTruthStore(tmp_path)
+    assert len(reopened) == 2
+    assert reopened.is_corrected("output/book/page_2.jpg")
+    assert reopened.items() == [("output/book/page_2.jpg", "corrected text")]
+    assert len(reopened.items(corrected_only=False)) == 2
+
+def test_evaluator_scores_and_caches(tmp_path):
+    """Test that prompts are ranked by error rate and cached responses are reused."""
+    llm = MagicMock()
+    llm.model = "model"
+    llm.max_tokens = 100
+    llm.transcribe_image.side_effect = lambda image, prompt: {
+        "choices": [], "usage": {"total_tokens": 10}, "text": "anno domini" if prompt == "good" else "anno"
+    }
+    llm.extract_analysis_text.side_effect = lambda response: response["text"]
+    image_analyzer = MagicMock()
+    image_analyzer.prepare_images_for_llm.side_effect = lambda pages: [
+        {"path": str(page), "data": str(page).encode()} for page in pages
+    ]
+    evaluator = PromptEvaluator(llm, image_analyzer, cache=ResponseCache(tmp_path), workers=2)
+    ground_truth = [("page_1.jpg", "anno domini"), ("page_2.jpg", "anno domini")]
+
+    scores = evaluator.evaluate({"bad": "bad", "good": "good"}, ground_truth)
+
+    assert [s["name"] for s in scores] == ["good", "bad"]
+    assert scores[0]["cer"] == 0.0
+    assert scores[1]["wer"] == 0.5
+    assert scores[0]["total_tokens"] == 20
+    assert llm.transcribe_image.call_count == 4
+
+    scores = evaluator.evaluate({"good": "good"}, ground_truth)
+
+    assert scores[0]["cached"] == 2
+    assert llm.transcribe_image.call_count == 4
+
+def test_evaluator_counts_errors():
+    """Test that failed requests are counted and left out of the score."""
+    llm = MagicMock()
+    llm.transcribe_image.side_effect = RuntimeError("API down")
+    image_analyzer = MagicMock()
+    image_analyzer.prepare_images_for_llm.return_value = [{"path": "page_1.jpg", "data": b"x"}]
+
+    scores = PromptEvaluator(llm, image_analyzer).evaluate({"current": "prompt"}, [("page_1.jpg", "text")])
+
+    assert scores[0]["errors"] == 1
+    assert scores[0]["cer"] is None
@@ -0,0 +1,100 @@
+import subprocess
+import sys
+import pytest
+from pathlib import Path
+
+import main
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def test_scan_without_api_key(tmp_path, capsys, monkeypatch):
+    """Test that scan works without an API key."""
+    monkeypatch.setattr(main.config, "OPENAI_API_KEY", None)
+    (tmp_path / "page.jpg").touch()
+    (tmp_path / "book.pdf").touch()
+    
+    assert main.main(["scan", "--input", str(tmp_path)]) == 0
+    
+    assert "1 PDFs, 1 images" in capsys.readouterr().out
+
+def test_analyze_requires_api_key(tmp_path, capsys, monkeypatch):
+    """Test that the API key is only validated by commands calling the API."""
+    monkeypatch.setattr(main.config, "OPENAI_API_KEY", None)
+    
+    assert main.main(["analyze", "--input", str(tmp_path), "--output", str(tmp_path / "out")]) == 1
+    
+    assert "OPENAI_API_KEY" in capsys.readouterr().out
+
+def test_analyze_options():
+    """Test parsing the analyze command options."""
+    args = main.build_parser().parse_args(["analyze", "--structured"])
+    
+    assert args.handler is main.cmd_analyze
+    assert args.structured
+
+def test_boolean_options_can_be_turned_off(monkeypatch):
+    """Test that options enabled through the environment can be disabled on the command line."""
+    monkeypatch.setattr(main.config, "PACKED_PAGES", True)
+    monkeypatch.setattr(main.config, "STRUCTURED_ANALYSIS", True)
+    
+    assert main.build_parser().parse_args(["analyze"]).packed
+    args = main.build_parser().parse_args(["analyze", "--no-packed", "--no-structured"])
+    
+    assert not args.packed
+    assert not args.structured
+
+def test_sample_size_must_be_positive():
+    """Test that a sample size below 1 is rejected."""
+    with pytest.raises(SystemExit):
+        main.build_parser().parse_args(["analyze", "--sample-size", "0"])
+
+def test_bench_forwards_options(monkeypatch):
+    """Test that bench passes its options on to the benchmark runner."""
+    import benchmarks.run
+    calls = []
+    monkeypatch.setattr(benchmarks.run, "main", lambda argv: calls.append(argv) or 0)
+    
+    assert main.main(["bench", "--pages", "2", "--stages", "pdf", "image"]) == 0
+    assert main.main(["bench", "--", "--help"]) == 0
+    
+    assert calls == [["--pages", "2", "--stages", "pdf", "image"], ["--help"]]
+
+def test_unknown_options_are_rejected():
+    """Test that only bench accepts unknown options."""
+    with pytest.raises(SystemExit):
+        main.main(["scan", "--pages", "2"])
+
+def test_scan_does_not_import_heavy_modules(tmp_path):
+    """Test that quick commands don't import pdf2image, PIL or requests."""
+    code = (
+        "import sys, main; main.main(['scan', '--input', sys.argv[1]]); "
+        "print(sorted(m for m in ('pdf2image', 'PIL', 'requests') if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code, str(tmp_path)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+def test_evaluate_options():
+    """Test parsing the evaluate command options."""
+    args = main.build_parser().parse_args(["evaluate", "--variant", "a.txt", "--variant", "b.txt", "--prompt", "p.txt"])
+    
+    assert args.handler is main.cmd_evaluate
+    assert args.variant == [Path("a.txt"), Path("b.txt")]
+    assert args.prompt == Path("p.txt")
+
+def test_evaluate_rejects_duplicate_variant_names(tmp_path, capsys):
+    """Test that variants cannot replace the current prompt or each other in the ranking."""
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "terse.txt").write_text("Be terse.")
+    (tmp_path / "terse.txt").write_text("Be terse too.")
+    (tmp_path / "current.txt").write_text("Other prompt.")
+    
+    for variants in (["a/terse.txt", "terse.txt"], ["current.txt"]):
+        argv = ["evaluate", "--output", str(tmp_path / "out")]
+        for variant in variants:
+            argv += ["--variant", str(tmp_path / variant)]
+        assert main.main(argv) == 1
+        assert "Duplicate prompt name" in capsys.readouterr().out
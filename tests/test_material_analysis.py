@@ -0,0 +1,100 @@
+import json
+import pytest
+from unittest.mock import patch
+
+from src.material_analysis import MaterialAnalysis, AnalysisValidationError, build_analysis_schema, is_settled
+from src.llm_interface import LLMInterface
+
+VALID_ANALYSIS = {
+    "language": "Latin",
+    "time_period": "16th century",
+    "material_type": "Diaries",
+    "script_type": "Handwritten",
+    "format_layout": "Single column",
+    "sequencing": "Numbered folios",
+    "dependencies": "Entries continue across pages",
+    "transcription_challenges": ["Abbreviations", "Faded ink"]
+}
+
+def make_response(content):
+    """Build a minimal chat completion response."""
+    return {"choices": [{"message": {"content": content}}]}
+
+def test_from_dict_valid():
+    """Test parsing a valid analysis."""
+    analysis = MaterialAnalysis.from_dict(VALID_ANALYSIS)
+    
+    assert analysis.language == "Latin"
+    assert analysis.script_type == "handwritten"
+    assert analysis.transcription_challenges == ["Abbreviations", "Faded ink"]
+
+def test_from_dict_missing_and_invalid_fields():
+    """Test that validation reports missing and invalid fields."""
+    data = dict(VALID_ANALYSIS, script_type="typed")
+    del data["language"]
+    
+    with pytest.raises(AnalysisValidationError, match="language") as excinfo:
+        MaterialAnalysis.from_dict(data)
+    assert "script_type" in str(excinfo.value)
+
+def test_from_json_invalid():
+    """Test that non-JSON output is rejected."""
+    with pytest.raises(AnalysisValidationError):
+        MaterialAnalysis.from_json("The document is written in Latin.")
+
+def test_schema_requires_all_fields():
+    """Test that the schema requires every dataclass field."""
+    schema = build_analysis_schema(["Diaries"])
+    
+    assert set(schema["required"]) == set(VALID_ANALYSIS)
+    assert "Diaries" in schema["properties"]["material_type"]["description"]
+
+def test_extract_structured_analysis_repairs_once():
+    """Test that an invalid response triggers a single repair request."""
+    llm = LLMInterface(api_key="key", api_url="http://localhost", model="model", structured_outputs=True)
+    invalid = dict(VALID_ANALYSIS)
+    del invalid["sequencing"]
+    
+    with patch.object(llm, "_post", return_value=make_response(json.dumps(VALID_ANALYSIS))) as mock_post:
+        analysis = llm.extract_structured_analysis(make_response(json.dumps(invalid)))
+    
+    assert analysis.sequencing == "Numbered folios"
+    mock_post.assert_called_once()
+    payload = mock_post.call_args[0][0]
+    assert payload["response_format"] == {"type": "json_object"}
+
+def test_structured_analysis_payload_fallback():
+    """Test that the schema is only enforced with response_format for models supporting structured outputs."""
+    for structured_outputs in (False, True):
+        llm = LLMInterface(api_key="key", api_url="http://localhost", model="model",
+                           structured_outputs=structured_outputs)
+        fenced = make_response(f"```json\n{json.dumps(VALID_ANALYSIS)}\n```")
+        with patch.object(llm, "_post", return_value=fenced) as mock_post:
+            analysis = llm.extract_structured_analysis(llm.analyze_images_structured([], ["Diaries"]))
+        
+        payload = mock_post.call_args[0][0]
+        assert "Respond only with a JSON object" in payload["messages"][0]["content"][0]["text"]
+        assert ("response_format" in payload) == structured_outputs
+        assert analysis.language == "Latin"
+        mock_post.assert_called_once()
+
+def test_extract_structured_analysis_repair_fails():
+    """Test that validation errors are raised after the repair attempts."""
+    llm = LLMInterface(api_key="key", api_url="http://localhost", model="model")
+    
+    with patch.object(llm, "_post", return_value=make_response("still not json")):
+        with pytest.raises(AnalysisValidationError):
+            llm.extract_structured_analysis(make_response("not json"))
+
+def test_is_settled_requires_clear_majority():
+    """Test that ties and narrow leads are not settled, while free-text periods are ignored."""
+    def pages(*languages):
+        return [MaterialAnalysis.from_dict(dict(VALID_ANALYSIS, language=language, time_period=f"{i}00s"))
+                for i, language in enumerate(languages)]
+    
+    assert is_settled(pages("Latin", "latin "))
+    assert not is_settled(pages("Latin", "German"))
+    assert not is_settled(pages("Latin", "German", "German", "Latin"))
+    assert not is_settled(pages("Latin", "German", "German"))
+    assert is_settled(pages("Latin", "German", "German", "German"))
+    assert not is_settled([])
@@ -0,0 +1,153 @@
+import base64
+import pytest
+from PIL import Image
+import io
+from pathlib import Path
+
+from src.page_store import PageStore, PageStoreWriter, PageRef, BufferReader, close_stores, open_store, parse_page
+from src.image_analyzer import ImageAnalyzer
+
+@pytest.fixture
+def store_path(tmp_path):
+    """Create a page store with three pages."""
+    path = tmp_path / "document.pages"
+    with PageStoreWriter(path) as writer:
+        for i in range(3):
+            writer.add_page(f"page-{i}".encode(), f"thumb-{i}".encode())
+    yield path
+    close_stores()
+
+def test_random_access(store_path):
+    """Test reading pages and thumbnails by index."""
+    with PageStore(store_path) as store:
+        assert len(store) == 3
+        assert bytes(store.get_page(2)) == b"page-2"
+        assert bytes(store.get_thumbnail(0)) == b"thumb-0"
+
+def test_index_out_of_range(store_path):
+    """Test that invalid page indices are rejected."""
+    with PageStore(store_path) as store:
+        with pytest.raises(IndexError):
+            store.get_page(3)
+
+def test_invalid_file(tmp_path):
+    """Test that files without the store header are rejected."""
+    path = tmp_path / "invalid.pages"
+    path.write_bytes(b"not a page store at all")
+    
+    with pytest.raises(ValueError, match="Not a page store"):
+        PageStore(path)
+
+def test_writer_abort_on_error(tmp_path):
+    """Test that a failed write leaves no store behind."""
+    path = tmp_path / "failed.pages"
+    
+    with pytest.raises(RuntimeError):
+        with PageStoreWriter(path) as writer:
+            writer.add_page(b"page")
+            raise RuntimeError("rasterization failed")
+    
+    assert list(tmp_path.iterdir()) == []
+
+def test_page_ref(store_path):
+    """Test reading through shared page references."""
+    refs = [PageRef(store_path, i) for i in range(3)]
+    
+    assert bytes(refs[1].read()) == b"page-1"
+    assert bytes(refs[1].read_thumbnail()) == b"thumb-1"
+    assert str(refs[0]).endswith("document.pages#page=1")
+    assert sorted(reversed(refs)) == refs
+
+def test_encode_page_ref_passes_jpeg_through(tmp_path):
+    """Test that stored JPEG pages are sent without re-encoding."""
+    page = io.BytesIO()
+    Image.new("RGB", (200, 100), "white").save(page, "JPEG")
+    path = tmp_path / "document.pages"
+    with PageStoreWriter(path) as writer:
+        writer.add_page(page.getvalue())
+    
+    try:
+        encoded = ImageAnalyzer().encode_image_to_base64(PageRef(path, 0))
+    finally:
+        close_stores()
+    
+    assert base64.b64decode(encoded) == page.getvalue()
+
+def test_prepare_raw_page_ref_is_zero_copy(tmp_path):
+    """Test that raw image data of stored JPEG pages is a view of the store."""
+    page = io.BytesIO()
+    Image.new("RGB", (200, 100), "white").save(page, "JPEG")
+    path = tmp_path / "document.pages"
+    with PageStoreWriter(path) as writer:
+        writer.add_page(page.getvalue())
+    
+    image_data = ImageAnalyzer(raw=True).prepare_images_for_llm([PageRef(path, 0)])
+    data = image_data[0]["data"]
+    
+    assert isinstance(data, memoryview)
+    assert bytes(data) == page.getvalue()
+    data.release()
+    close_stores()
+
+def test_close_stores_with_page_in_use(tmp_path):
+    """Test that closing the shared stores skips stores with live page views and clears the registry."""
+    paths = [tmp_path / "first.pages", tmp_path / "second.pages"]
+    for path in paths:
+        with PageStoreWriter(path) as writer:
+            writer.add_page(b"page")
+    first, second = open_store(paths[0]), open_store(paths[1])
+    page = first.get_page(0)
+    
+    close_stores()
+    
+    assert bytes(page) == b"page"
+    assert second._mmap.closed
+    assert open_store(paths[0]) is not first
+    page.release()
+    close_stores()
+
+def test_parse_page(tmp_path):
+    """Test that page identifiers parse back into page sources."""
+    ref = PageRef(tmp_path / "document.pages", 4)
+    
+    assert parse_page(str(ref)) == ref
+    assert parse_page("output/page_1.jpg") == Path("output/page_1.jpg")
+
+def test_rewritten_store_is_reopened(tmp_path):
+    """Test that page references read the new file after a store is rewritten."""
+    path = tmp_path / "document.pages"
+    with PageStoreWriter(path) as writer:
+        writer.add_page(b"old")
+    assert bytes(PageRef(path, 0).read()) == b"old"
+    
+    with PageStoreWriter(path) as writer:
+        writer.add_page(b"new-0")
+        writer.add_page(b"new-1")
+    
+    assert bytes(PageRef(path, 0).read()) == b"new-0"
+    assert bytes(PageRef(path, 1).read()) == b"new-1"
+    close_stores()
+
+def test_buffer_reader():
+    """Test reading and seeking in a buffer without copying it."""
+    reader = BufferReader(memoryview(b"0123456789"))
+    
+    assert reader.read(3) == b"012"
+    reader.seek(-2, io.SEEK_END)
+    assert reader.read() == b"89"
+    assert reader.tell() == 10
+
+def test_encode_page_ref_reencodes_png(tmp_path):
+    """Test that packed pages that are not JPEG are decoded from the store and re-encoded."""
+    page = io.BytesIO()
+    Image.new("RGB", (200, 100), "white").save(page, "PNG")
+    path = tmp_path / "document.pages"
+    with PageStoreWriter(path) as writer:
+        writer.add_page(page.getvalue())
+    
+    encoded = ImageAnalyzer().encode_image(PageRef(path, 0))
+    close_stores()
+    
+    with Image.open(io.BytesIO(encoded)) as img:
+        assert img.format == "JPEG"
+        assert img.size == (200, 100)
@@ -0,0 +1,70 @@
+import base64
+import gzip
+import json
+import os
+import pytest
+
+from benchmarks.mock_llm_server import MockLLMServer
+from src.llm_interface import LLMInterface
+from src.payload import ImageData, StreamingPayload
+
+@pytest.fixture
+def images():
+    """Image buffers with lengths covering every base64 padding case."""
+    return [os.urandom(1000), memoryview(os.urandom(1001)), bytearray(os.urandom(1002))]
+
+def expected_body(payload, images):
+    """Serialize a payload the non-streaming way."""
+    urls = iter(f"data:image/jpeg;base64,{base64.b64encode(bytes(img)).decode()}" for img in images)
+    return json.dumps(payload, default=lambda value: next(urls)).encode()
+
+def make_payload(images):
+    return {
+        "model": "model",
+        "messages": [{"role": "user", "content": [{"type": "text", "text": "Transcribe \"this\" é"}] + [
+            {"type": "image_url", "image_url": {"url": ImageData(img)}} for img in images
+        ]}]
+    }
+
+def test_streaming_payload_matches_json(images):
+    """Test that the streamed body equals the eagerly serialized one."""
+    payload = make_payload(images)
+    body = StreamingPayload(payload, chunk_size=100)
+
+    assert body.to_bytes() == expected_body(payload, images)
+    assert len(body) == len(body.to_bytes())
+
+def test_streaming_payload_chunks(images):
+    """Test that image data is encoded in chunks of the requested size."""
+    body = StreamingPayload(make_payload(images[:1]), chunk_size=301)
+
+    pieces = list(body)
+
+    # Opening JSON, data URL prefix, ceil(1000 / 300) chunks, closing JSON
+    assert len(pieces) == 1 + 1 + 4 + 1
+    assert max(len(p) for p in pieces[2:-1]) == 400
+
+def test_streaming_payload_gzip(images):
+    """Test that the gzip stream decompresses to the body."""
+    body = StreamingPayload(make_payload(images))
+
+    assert gzip.decompress(b"".join(body.iter_gzip())) == body.to_bytes()
+
+def test_streaming_payload_rejects_unknown_objects():
+    """Test that values that are neither JSON nor images are rejected."""
+    with pytest.raises(TypeError):
+        StreamingPayload({"value": object()})
+
+@pytest.mark.parametrize("use_gzip", [False, True])
+def test_post_streams_images(images, use_gzip):
+    """Test sending raw image data to the mock server, plain and compressed."""
+    with MockLLMServer() as server:
+        llm = LLMInterface(api_key="key", api_url=server.url, model="mock", gzip=use_gzip)
+        image_data = [{"path": f"page_{i}.jpg", "data": img} for i, img in enumerate(images)]
+        response = llm.analyze_images(image_data, ["Diaries"])
+
+    assert response["choices"][0]["message"]["content"]
+    assert server.requests == 1
+    if not use_gzip:
+        payload = llm._build_payload(llm.create_analysis_prompt(["Diaries"]), image_data)
+        assert server.bytes_received == len(expected_body(payload, images))
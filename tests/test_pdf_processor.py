@@ -1,6 +1,7 @@
 import pytest
 from pathlib import Path
 from unittest.mock import patch, MagicMock
+import io
 
 from src.pdf_processor import PDFProcessor
 
@@ -52,4 +53,26 @@ def test_convert_pdf_error_handling(mock_convert, pdf_processor, tmp_path):
     
     # Execute and assert
     with pytest.raises(Exception, match="PDF conversion failed"):
-        pdf_processor.convert_pdf_to_images(pdf_path) 
\ No newline at end of file
+        pdf_processor.convert_pdf_to_images(pdf_path) 
+
+@patch("src.pdf_processor.convert_from_path")
+def test_convert_pdf_to_packed_store(mock_convert, tmp_path):
+    """Test converting PDF pages into a packed page store."""
+    from PIL import Image
+    from src.page_store import PageRef, close_stores
+    
+    pdf_path = tmp_path / "test.pdf"
+    pdf_path.touch()
+    mock_convert.return_value = [Image.new("RGB", (400, 600), "white") for _ in range(2)]
+    processor = PDFProcessor(tmp_path / "output", packed=True, thumbnail_size=(64, 64))
+    
+    result = processor.convert_pdf_to_images(pdf_path)
+    
+    assert result == [PageRef(tmp_path / "output" / "test.pages", 0), PageRef(tmp_path / "output" / "test.pages", 1)]
+    try:
+        with Image.open(io.BytesIO(result[1].read())) as page:
+            assert page.size == (400, 600)
+        with Image.open(io.BytesIO(result[1].read_thumbnail())) as thumbnail:
+            assert max(thumbnail.size) <= 64
+    finally:
+        close_stores()
@@ -0,0 +1,101 @@
+import random
+import pytest
+from PIL import Image
+
+np = pytest.importorskip("numpy")
+
+from benchmarks.corpus import render_page
+from src.image_analyzer import ImageAnalyzer
+from src.preprocessing import (
+    PreprocessOptions, estimate_skew, content_box, adaptive_binarize, preprocess_image, preprocess_to_jpeg
+)
+
+@pytest.fixture
+def page():
+    """Render a synthetic page without skew."""
+    return render_page(60, 0.8, random.Random(1)).convert("L")
+
+@pytest.mark.parametrize("angle", [-3.0, 0.0, 1.4])
+def test_estimate_skew(page, angle):
+    """Test that the skew of rotated pages is recovered."""
+    rotated = page.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=245)
+    
+    assert estimate_skew(np.asarray(rotated)) == pytest.approx(angle, abs=0.25)
+
+def test_content_box_removes_scanner_bed(page):
+    """Test that the scanner bed and empty margins are cropped."""
+    bed = Image.new("L", (page.width + 80, page.height + 60), 60)
+    bed.paste(page, (40, 30))
+    
+    left, top, right, bottom = content_box(np.asarray(bed), padding=0)
+    
+    assert 40 < left and 30 < top
+    assert right < 40 + page.width and bottom < 30 + page.height
+
+def test_adaptive_binarize_handles_uneven_lighting():
+    """Test that ink is separated from a background gradient."""
+    gray = np.tile(np.linspace(120, 250, 200), (100, 1)).astype(np.uint8)
+    gray[40:60, 20:30] = 60
+    gray[40:60, 170:180] = 170
+    
+    binary = adaptive_binarize(gray, window=31, offset=20)
+    
+    assert binary[50, 25] == 0 and binary[50, 175] == 0
+    assert binary[10, 25] == 255 and binary[10, 175] == 255
+
+def test_preprocess_scan():
+    """Test the full preprocessing of a skewed scan."""
+    scan = render_page(60, 0.8, random.Random(2), scanned=True)
+    
+    result = preprocess_image(scan, PreprocessOptions(binarize=True))
+    
+    assert result.mode == "L"
+    assert result.width < scan.width and result.height < scan.height
+    assert abs(estimate_skew(np.asarray(result))) <= 0.25
+
+def test_preprocess_blank_page():
+    """Test that pages without any ink are left as they are."""
+    img = Image.new("L", (200, 300), 255)
+    
+    assert preprocess_image(img, PreprocessOptions(binarize=True)).size == (200, 300)
+
+def test_from_steps():
+    """Test parsing preprocessing steps."""
+    assert PreprocessOptions.from_steps("") is None
+    assert PreprocessOptions.from_steps("crop, binarize") == PreprocessOptions(deskew=False, binarize=True)
+    with pytest.raises(ValueError):
+        PreprocessOptions.from_steps("sharpen")
+
+def test_preprocess_cache(tmp_path):
+    """Test that preprocessed images are cached by content and options."""
+    image_path = tmp_path / "scan.jpg"
+    render_page(40, 0.8, random.Random(3), scanned=True).save(image_path)
+    cache_dir = tmp_path / "cache"
+    
+    first = preprocess_to_jpeg(image_path, PreprocessOptions(), cache_dir=cache_dir)
+    second = preprocess_to_jpeg(image_path, PreprocessOptions(), cache_dir=cache_dir)
+    preprocess_to_jpeg(image_path, PreprocessOptions(binarize=True), cache_dir=cache_dir)
+    
+    assert first == second
+    assert len(list(cache_dir.iterdir())) == 2
+
+def test_image_analyzer_preprocesses_in_pool(tmp_path):
+    """Test preparing preprocessed images with several worker processes."""
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"scan_{i}.jpg"
+        render_page(40, 0.8, random.Random(i), scanned=True).save(path)
+        paths.append(path)
+    analyzer = ImageAnalyzer(preprocess=PreprocessOptions(), workers=2)
+    
+    try:
+        image_data = analyzer.prepare_images_for_llm(paths + [tmp_path / "missing.jpg"])
+        executor = analyzer._executor
+        # Single pages use the same long-lived pool
+        assert len(analyzer.prepare_images_for_llm(paths[:1])) == 1
+        assert analyzer._executor is executor
+    finally:
+        analyzer.close()
+    
+    assert [item["path"] for item in image_data] == [str(path) for path in paths]
+    assert analyzer._executor is None
@@ -0,0 +1,87 @@
+import json
+import sys
+import pytest
+
+from src import profiling
+from src.profiling import StageProfiler
+
+@pytest.fixture
+def profiler():
+    """Activate a fresh profiler for the duration of a test."""
+    active = profiling.enable()
+    yield active
+    profiling.disable()
+
+def test_stage_records_durations(profiler):
+    """Test that module-level stages are recorded on the active profiler."""
+    with profiling.stage("scan"):
+        pass
+    with profiling.stage("scan"):
+        pass
+    profiling.add_bytes("request_body", 100)
+    profiling.add_bytes("request_body", 50)
+    
+    report = profiler.report()
+    
+    assert report["stages"]["scan"]["count"] == 2
+    assert report["stages"]["scan"]["buckets"]["+Inf"] == 2
+    assert report["bytes"]["request_body"] == 150
+
+def test_stage_disabled_is_noop():
+    """Test that the helpers do nothing without an active profiler."""
+    profiling.disable()
+    
+    with profiling.stage("scan"):
+        profiling.add_bytes("request_body", 10)
+    
+    assert profiling.get_profiler() is None
+
+def test_stage_records_on_exception():
+    """Test that a stage is recorded even when the block raises."""
+    profiler = StageProfiler()
+    
+    with pytest.raises(RuntimeError):
+        with profiler.stage("http_request"):
+            raise RuntimeError("failed")
+    
+    assert profiler.report()["stages"]["http_request"]["count"] == 1
+
+def test_percentiles():
+    """Test the summary statistics of a stage."""
+    profiler = StageProfiler()
+    for seconds in [0.1, 0.2, 0.3, 0.4]:
+        profiler.record("image_encode", seconds)
+    
+    stats = profiler.report()["stages"]["image_encode"]
+    
+    assert stats["min"] == 0.1
+    assert stats["max"] == 0.4
+    assert stats["p50"] == 0.2
+    assert stats["p95"] == 0.4
+    assert stats["buckets"]["0.25"] == 2
+
+def test_write_reports(tmp_path):
+    """Test the JSON and Prometheus exports."""
+    profiler = StageProfiler()
+    profiler.record("pdf_rasterize", 0.5)
+    profiler.add_bytes("request_body", 2048)
+    
+    profiler.write_json(tmp_path / "metrics.json")
+    profiler.write_prometheus(tmp_path / "metrics.prom")
+    
+    report = json.loads((tmp_path / "metrics.json").read_text())
+    assert report["stages"]["pdf_rasterize"]["count"] == 1
+    prom = (tmp_path / "metrics.prom").read_text()
+    assert 'transkriptor_stage_seconds_count{stage="pdf_rasterize"} 1' in prom
+    assert 'transkriptor_bytes_total{counter="request_body"} 2048' in prom
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="peak RSS reset is Linux only")
+def test_reset_peak_rss():
+    """Test that the peak RSS can be reset so child processes measure their own peak."""
+    block = bytearray(64 * 1024 * 1024)
+    block[::4096] = b"x" * len(block[::4096])
+    peak = profiling.peak_rss_bytes()
+    del block
+    
+    assert profiling.reset_peak_rss()
+    assert profiling.peak_rss_bytes() < peak - 32 * 1024 * 1024
@@ -0,0 +1,58 @@
+import pytest
+
+from src.results_store import ResultsStore, page_location
+
+@pytest.fixture
+def store(tmp_path):
+    """Create a results store with a few transcriptions."""
+    with ResultsStore(tmp_path / "results.db", batch_size=2) as store:
+        store.add("output/book/page_1.jpg", "Anno domini millesimo", metadata={"language": "Latin"},
+                  usage={"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15})
+        store.add("output/book/page_2.jpg", "Inventarium bonorum", metadata={"language": "Latin"})
+        store.add("data/letter.jpg", "Lieber Freund", metadata={"language": "German"})
+        yield store
+
+def test_page_location():
+    """Test deriving document and page number from page identifiers."""
+    assert page_location("output/book/page_12.jpg") == ("book", 12)
+    assert page_location("output/book.pages#page=3") == ("book", 3)
+    assert page_location("data/letter.jpg") == ("letter", None)
+
+def test_query_by_language(store):
+    """Test selecting pages by an indexed column."""
+    records = store.query(language="Latin")
+    
+    assert [r["page_id"] for r in records] == ["output/book/page_1.jpg", "output/book/page_2.jpg"]
+    assert records[0]["document"] == "book"
+    assert records[0]["total_tokens"] == 15
+    assert "text" not in records[0]
+    assert store.count(language="German") == 1
+
+def test_search(store):
+    """Test full-text search with filters."""
+    assert [r["page_id"] for r in store.search("inventar*")] == ["output/book/page_2.jpg"]
+    assert store.search("freund", language="Latin") == []
+    assert "[Freund]" in store.search("freund")[0]["snippet"]
+
+def test_rewrite_replaces_record(store):
+    """Test that writing a page again replaces the text and the search index."""
+    store.add("data/letter.jpg", "Lieber Bruder", metadata={"language": "German"})
+    store.compact()
+    
+    assert store.count() == 3
+    assert store.search("freund") == []
+    assert store.query(document="letter", include_text=True)[0]["text"] == "Lieber Bruder"
+
+def test_unknown_filter(store):
+    """Test that unknown filter columns are rejected."""
+    with pytest.raises(ValueError):
+        store.query(text="Anno")
+
+def test_records_persist(tmp_path):
+    """Test that buffered records are written on close."""
+    path = tmp_path / "results.db"
+    with ResultsStore(path, batch_size=100) as store:
+        store.add("page.jpg", "text", stage="analysis")
+    
+    with ResultsStore(path) as store:
+        assert store.count(stage="analysis") == 1
@@ -55,4 +55,27 @@ def test_sample_images_alphabetical_order():
     
     # Remaining should be from the rest of the images
     for img in sampled[2:]:
-        assert img in [Path("cat.jpg"), Path("dog.jpg"), Path("zebra.jpg")] 
\ No newline at end of file
+        assert img in [Path("cat.jpg"), Path("dog.jpg"), Path("zebra.jpg")] 
+
+def test_sampling_order():
+    """Test that incremental sampling starts with the first two images and covers all images."""
+    from src.utils import sampling_order
+    
+    image_paths = [Path(f"image_{i}.jpg") for i in reversed(range(10))]
+    
+    ordered = sampling_order(image_paths)
+    
+    assert ordered[:2] == [Path("image_0.jpg"), Path("image_1.jpg")]
+    assert sorted(ordered) == sorted(image_paths)
+
+def test_validate_input_path_creates_default_directories(tmp_path, monkeypatch):
+    """Test that the default input and output directories are created on first use."""
+    import config
+    from src.utils import validate_input_path
+    
+    monkeypatch.setattr(config, "INPUT_DIR", tmp_path / "data")
+    monkeypatch.setattr(config, "OUTPUT_DIR", tmp_path / "output")
+    
+    assert validate_input_path() == tmp_path / "data"
+    assert (tmp_path / "data").is_dir()
+    assert (tmp_path / "output").is_dir()
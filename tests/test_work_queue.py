@@ -0,0 +1,78 @@
+import time
+import pytest
+
+from src.work_queue import WorkQueue
+
+@pytest.fixture
+def queue(tmp_path):
+    """Create a work queue with two tasks."""
+    queue = WorkQueue(tmp_path / "queue.db", visibility_timeout=60.0, max_attempts=2)
+    queue.enqueue([("page_1", {"path": "page_1.jpg"}), ("page_2", {"path": "page_2.jpg"})])
+    return queue
+
+def test_enqueue_is_idempotent(queue):
+    """Test that tasks are only queued once."""
+    assert queue.enqueue([("page_1", {"path": "page_1.jpg"}), ("page_3", {"path": "page_3.jpg"})]) == 1
+    assert queue.stats()["pending"] == 3
+
+def test_lease_is_exclusive(queue):
+    """Test that a leased task is not handed to another worker."""
+    first = queue.lease("worker-a")
+    second = queue.lease("worker-b", limit=5)
+    
+    assert [task.task_id for task in first] == ["page_1"]
+    assert [task.task_id for task in second] == ["page_2"]
+    assert queue.lease("worker-c") == []
+
+def test_expired_lease_is_retried(queue):
+    """Test that pages of stalled workers are picked up by other workers."""
+    queue.visibility_timeout = 0.01
+    queue.lease("worker-a", limit=2)
+    time.sleep(0.02)
+    
+    tasks = queue.lease("worker-b", limit=2)
+    
+    assert [task.attempts for task in tasks] == [2, 2]
+    # The stalled worker can no longer renew or fail the lease
+    assert queue.heartbeat("worker-a", ["page_1"]) == 0
+
+def test_expired_lease_fails_after_max_attempts(queue):
+    """Test that pages that keep stalling are marked as failed."""
+    queue.visibility_timeout = 0.01
+    queue.lease("worker-a", limit=2)
+    time.sleep(0.02)
+    queue.lease("worker-b", limit=2)
+    time.sleep(0.02)
+    
+    assert queue.lease("worker-c", limit=2) == []
+    assert queue.stats()["failed"] == 2
+    assert queue.is_finished()
+
+def test_complete_keeps_first_result(queue):
+    """Test that duplicate results are ignored."""
+    queue.lease("worker-a", limit=2)
+    
+    assert queue.complete("page_2", "worker-a", {"text": "first"})
+    assert not queue.complete("page_2", "worker-b", {"text": "second"})
+    assert queue.complete("page_1", "worker-a", {"text": "other"})
+    
+    assert queue.results() == [{"text": "other"}, {"text": "first"}]
+    assert queue.is_finished()
+
+def test_fail_requeues_until_max_attempts(queue):
+    """Test that failed tasks are retried and then marked as failed."""
+    queue.lease("worker-a")
+    queue.fail("page_1", "worker-a", "timeout")
+    assert queue.stats()["pending"] == 2
+    
+    queue.lease("worker-a")
+    queue.fail("page_1", "worker-a", "timeout")
+    
+    assert queue.failures() == {"page_1": "timeout"}
+
+def test_queue_uses_rollback_journal(queue):
+    """Test that the queue does not use WAL, which fails on network filesystems."""
+    queue.lease("worker-a")
+    
+    assert not queue.path.with_name(queue.path.name + "-wal").exists()
+    assert queue._connect().execute("PRAGMA journal_mode").fetchone()[0] == "delete"